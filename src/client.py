@@ -1,4 +1,6 @@
 import json
+import heapq
+import itertools
 import threading
 import time
 import os
@@ -6,6 +8,7 @@ from gi.repository import GObject, GLib
 import traceback
 import gnostr
 from gnostr.util.connection_state import ConnectionState
+from gnostr.util import fastjson
     # Connection status definitions (Name, ColorCode)
 STATUS = {
         "CONNECTED": ("🟢 Connected", "#28a745"),  # Green
@@ -24,6 +27,40 @@ class ConnectionStatus:
     GREEN = ("Connected", "Green") # Stable/Operational
     YELLOW = ("Warning", "Yellow")  # Transient issue, e.g., Rate Limiting
     RED = ("Disconnected", "Red")   # Critical failure or no relay connectivity
+# Window for merging duplicate thread/profile fetches into one subscription
+COALESCE_MS = 200
+# Minimum gap between one-shot REQs on the same relay (keeps us under rate limits)
+REQ_SPACING = 0.1
+
+class _SendScheduler:
+    """One background thread that writes paced one-shot REQs for every relay."""
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._thread = None
+
+    def send_at(self, due, relay, sub_id, filters):
+        with self._cv:
+            heapq.heappush(self._heap, (due, next(self._seq), relay, sub_id, filters))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._heap: self._cv.wait()
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._cv.wait(delay)
+                    continue
+                _, _, relay, sub_id, filters = heapq.heappop(self._heap)
+            relay._send_req(sub_id, filters)
+
+_sender = _SendScheduler()
+
 DEFAULT_RELAYS = [
     "wss://relay.nostr.band",
     "wss://nos.lol",
@@ -38,15 +75,19 @@ class NostrRelay(GObject.Object):
         self.on_status = on_status
         self.ws = None
         self.is_connected = False
+        # True from start() until run_forever returns, i.e. also while the handshake runs
+        self.is_running = False
         self.sub_id = None
         self.request_queue = []
-        self.is_processing_queue = False
+        self._next_send = 0.0
+        # process_queue runs on the websocket thread (on_open) and the main loop (request_once)
+        self._queue_lock = threading.Lock()
         self.snapshot_ids = set() # Track subscriptions that should close on EOSE
 
     def start(self):
         def on_msg(ws, m):
             try:
-                d = json.loads(m)
+                d = fastjson.loads(m)
                 if d[0] == "EVENT":
                     self.on_event(d[2])
                 elif d[0] == "EOSE":
@@ -54,7 +95,7 @@ class NostrRelay(GObject.Object):
                     if sub_id in self.snapshot_ids:
                         # Auto-close snapshot subscription
                         # print(f"DEBUG [{self.url}] Closing Snapshot {sub_id}")
-                        self.ws.send(json.dumps(["CLOSE", sub_id]))
+                        self.ws.send(fastjson.dumps(["CLOSE", sub_id]))
                         self.snapshot_ids.remove(sub_id)
                 elif d[0] == "NOTICE":
                     print(f"NOTICE [{self.url}]: {d[1]}")
@@ -77,17 +118,24 @@ class NostrRelay(GObject.Object):
             GLib.idle_add(self.on_status, self.url, ConnectionState.DISCONNECTED)
 
         self.ws = websocket.WebSocketApp(self.url, on_open=on_open, on_message=on_msg, on_error=on_err, on_close=on_close)
-        threading.Thread(target=self.ws.run_forever, daemon=True).start()
+        self.is_running = True
+        threading.Thread(target=self._run, args=(self.ws,), daemon=True).start()
+
+    def _run(self, ws):
+        try: ws.run_forever()
+        finally:
+            # A superseded socket must not clear the flag of its replacement
+            if ws is self.ws: self.is_running = False
 
     def restart(self):
-        if not self.is_connected:
-            # Simple restart check: if thread is dead, start new one?
-            # WebSocketApp run_forever blocks, so if it exited, the thread died.
-            # We can just call start() again.
+        # Only once the socket has really closed; a relay mid-handshake is left alone
+        # so we never run two WebSocketApps for one relay
+        if not self.is_connected and not self.is_running:
             self.start()
 
     def subscribe(self, sub_id, filters, snapshot=False):
-        if not self.is_connected: return
+        # Returns True only if the REQ actually went out on this relay
+        if not self.is_connected: return False
 
         # If it's a new subscription or different ID, close old one?
         # Typically we just send REQ.
@@ -98,8 +146,9 @@ class NostrRelay(GObject.Object):
             self.snapshot_ids.remove(sub_id)
 
         self.sub_id = sub_id
-        try: self.ws.send(json.dumps(["REQ", sub_id] + (filters if isinstance(filters, list) else [filters])))
-        except: pass
+        try: self.ws.send(fastjson.dumps(["REQ", sub_id] + (filters if isinstance(filters, list) else [filters])))
+        except: return False
+        return True
 
     def request_once(self, sub_id, filters):
         self.request_queue.append((sub_id, filters))
@@ -107,23 +156,25 @@ class NostrRelay(GObject.Object):
             self.process_queue()
 
     def process_queue(self):
-        if self.is_processing_queue or not self.request_queue: return
-        self.is_processing_queue = True
-
-        def _worker():
+        # Hand queued REQs to the shared sender, spaced REQ_SPACING apart on this relay
+        with self._queue_lock:
             while self.request_queue and self.is_connected:
                 sub_id, filters = self.request_queue.pop(0)
-                try:
-                    self.ws.send(json.dumps(["REQ", sub_id] + (filters if isinstance(filters, list) else [filters])))
-                    time.sleep(0.1)
-                except: break
-            self.is_processing_queue = False
+                due = max(time.monotonic(), self._next_send)
+                self._next_send = due + REQ_SPACING
+                _sender.send_at(due, self, sub_id, filters)
 
-        threading.Thread(target=_worker, daemon=True).start()
+    def _send_req(self, sub_id, filters):
+        if not self.is_connected:
+            # Dropped while waiting; resend on the next on_open
+            self.request_queue.append((sub_id, filters))
+            return
+        try: self.ws.send(fastjson.dumps(["REQ", sub_id] + (filters if isinstance(filters, list) else [filters])))
+        except: self.request_queue.append((sub_id, filters))
 
     def publish(self, event_json):
         if not self.is_connected: return
-        try: self.ws.send(json.dumps(["EVENT", event_json]))
+        try: self.ws.send(fastjson.dumps(["EVENT", event_json]))
         except: pass
 
     def close(self):
@@ -131,12 +182,13 @@ class NostrRelay(GObject.Object):
 
 class NostrClient(GObject.Object):
     __gsignals__ = {
-        'event-received': (GObject.SignalFlags.RUN_FIRST, None, (str, str, str, str)),
+        'event-received': (GObject.SignalFlags.RUN_FIRST, None, (str, str, str, object, GObject.TYPE_INT64)),
         'profile-updated': (GObject.SignalFlags.RUN_FIRST, None, (str,)),
         'contacts-updated': (GObject.SignalFlags.RUN_FIRST, None, ()),
         'status-changed': (GObject.SignalFlags.RUN_FIRST, None, (str,)),
         'relay-list-updated': (GObject.SignalFlags.RUN_FIRST, None, ()),
         'metrics-updated': (GObject.SignalFlags.RUN_FIRST, None, (str, int, int, int)),
+        'relay-connected': (GObject.SignalFlags.RUN_FIRST, None, (str,)),
     }
 
     def __init__(self, db):
@@ -149,6 +201,10 @@ class NostrClient(GObject.Object):
         self.my_privkey = None
         self.requested_profiles = set()
         self.metrics = {} 
+        # fetch_thread/fetch_profile calls landing within COALESCE_MS share one REQ
+        self._pending_threads = set()
+        self._pending_profiles = set()
+        self._coalesce_source = None
         self.config_file = os.path.join(GLib.get_user_config_dir(), "gnostr", "config.json")
         self.load_config()
 
@@ -171,11 +227,9 @@ class NostrClient(GObject.Object):
     def set_keys(self, pub, priv): self.my_pubkey = pub; self.my_privkey = priv
 
     def connect_all(self):
-        def _connect_loop():
-            for url in list(self.relay_urls):
-                GLib.idle_add(self.add_relay_connection, url)
-                time.sleep(0.2)
-        threading.Thread(target=_connect_loop, daemon=True).start()
+        # Stagger relay startups on the main loop instead of a sleeping helper thread
+        for i, url in enumerate(list(self.relay_urls)):
+            GLib.timeout_add(i * 200, self.add_relay_connection, url, priority=GLib.PRIORITY_LOW)
 
     def add_relay_connection(self, url):
         if url in self.active_relays:
@@ -217,7 +271,9 @@ class NostrClient(GObject.Object):
             r.request_once(sub_id, filters)
 
     def subscribe(self, sub_id, filters, snapshot=False):
-        for r in self.active_relays.values(): r.subscribe(sub_id, filters, snapshot=snapshot)
+        # True if at least one connected relay took the REQ
+        sent = [r.subscribe(sub_id, filters, snapshot=snapshot) for r in self.active_relays.values()]
+        return any(sent)
 
     def publish(self, event):
         for r in self.active_relays.values():
@@ -270,7 +326,8 @@ class NostrClient(GObject.Object):
     def _handle_event(self, ev):
         try:
             eid = ev.get('id'); kind = ev['kind']; pubkey = ev['pubkey']
-            tags = ev.get('tags', [])
+            tags = ev.get('tags') or []
+            if not isinstance(tags, list): tags = []
         except KeyError as e:
             print(f"❌ ERROR: Malformed Event: {e}")
             return
@@ -313,7 +370,7 @@ class NostrClient(GObject.Object):
                 if nr: self._merge_relays(nr)
 
         elif kind == 1:
-            GLib.idle_add(self.emit, 'event-received', eid, pubkey, ev['content'], json.dumps(tags))
+            GLib.idle_add(self.emit, 'event-received', eid, pubkey, ev['content'], tags, int(ev.get('created_at') or 0))
 
     def _merge_relays(self, new_list):
         changed = False
@@ -325,17 +382,58 @@ class NostrClient(GObject.Object):
             self.save_config()
             GLib.idle_add(self.emit, 'relay-list-updated')
 
-    def _handle_status(self, url, status): self.emit('status-changed', status.status)
+    def _handle_status(self, url, status):
+        self.emit('status-changed', status.status)
+        if status is ConnectionState.CONNECTED:
+            # Each relay gets the logged-in user's bootstrap queries as soon as it is up
+            relay = self.active_relays.get(url)
+            if relay: self._sync_user(relay)
+            self.emit('relay-connected', url)
+
+    def sync_user(self):
+        for r in self.active_relays.values():
+            if r.is_connected: self._sync_user(r)
+
+    def _sync_user(self, relay):
+        if not self.my_pubkey: return
+        pk = self.my_pubkey
+        relay.request_once(f"user_{pk[:8]}", [
+            {"kinds": [0], "authors": [pk], "limit": 1},
+            {"kinds": [3], "authors": [pk], "limit": 1},
+            {"kinds": [10002], "authors": [pk], "limit": 1},
+        ])
+
+    def refetch_profile(self, pubkey):
+        # fetch_profile only asks once per pubkey; this is for explicit retries
+        self.requested_profiles.discard(pubkey)
+        self.fetch_profile(pubkey)
     def fetch_contacts(self):
         if self.my_pubkey: self.subscribe("sub_contacts", {"kinds": [3], "authors": [self.my_pubkey], "limit": 1})
     def fetch_profile(self, pubkey):
         if pubkey in self.requested_profiles: return
         self.requested_profiles.add(pubkey)
-        for r in self.active_relays.values(): r.request_once(f"meta_{pubkey[:8]}", {"kinds": [0], "authors": [pubkey], "limit": 1})
+        self._pending_profiles.add(pubkey)
+        self._schedule_coalesced_flush()
     def fetch_thread(self, root_id):
-        f1 = {"ids": [root_id]}
-        f2 = {"kinds": [1], "#e": [root_id], "limit": 50}
-        f3 = {"kinds": [6, 7], "#e": [root_id], "limit": 100}
-        self.subscribe(f"thread_{root_id}", [f1, f2, f3])
+        self._pending_threads.add(root_id)
+        self._schedule_coalesced_flush()
+    def _schedule_coalesced_flush(self):
+        if self._coalesce_source: return
+        self._coalesce_source = GLib.timeout_add(COALESCE_MS, self._flush_coalesced, priority=GLib.PRIORITY_LOW)
+    def _flush_coalesced(self):
+        self._coalesce_source = None
+        threads, self._pending_threads = self._pending_threads, set()
+        profiles, self._pending_profiles = self._pending_profiles, set()
+        for root_id in threads:
+            f1 = {"ids": [root_id]}
+            f2 = {"kinds": [1], "#e": [root_id], "limit": 50}
+            f3 = {"kinds": [6, 7], "#e": [root_id], "limit": 100}
+            self.subscribe(f"thread_{root_id}", [f1, f2, f3])
+        if profiles:
+            authors = sorted(profiles)
+            sub_id = f"meta_{authors[0][:8]}" if len(authors) == 1 else f"meta_{authors[0][:8]}_{len(authors)}"
+            f = {"kinds": [0], "authors": authors, "limit": len(authors)}
+            for r in self.active_relays.values(): r.request_once(sub_id, f)
+        return False
     def close(self): 
         for r in self.active_relays.values(): r.close()
@@ -4,6 +4,7 @@ import json
 import time
 import threading
 import traceback
+from gnostr.util import fastjson
 from gi.repository import GLib
 
 class Database:
@@ -73,7 +74,7 @@ class Database:
                     event['created_at'],
                     event['kind'],
                     event['content'],
-                    json.dumps(event['tags']),
+                    fastjson.dumps(event['tags']),
                     event['sig']
                 ))
                 self.conn.commit()
@@ -121,6 +122,28 @@ class Database:
                 }
             return None
 
+    def get_profiles(self, pubkeys):
+        """Batch form of get_profile: {pubkey: profile} for the pubkeys that have one."""
+        if not self.conn: return {}
+        pubkeys = list(dict.fromkeys(pubkeys))
+        result = {}
+        with self.lock:
+            cursor = self.conn.cursor()
+            # Stay well under SQLite's host parameter limit
+            for i in range(0, len(pubkeys), 500):
+                chunk = pubkeys[i:i + 500]
+                cursor.execute(
+                    "SELECT pubkey, name, display_name, about, picture FROM profiles WHERE pubkey IN (%s)"
+                    % ",".join("?" * len(chunk)), chunk)
+                for row in cursor.fetchall():
+                    result[row[0]] = {
+                        "name": row[1],
+                        "display_name": row[2],
+                        "about": row[3],
+                        "picture": row[4]
+                    }
+        return result
+
     def get_event_by_id(self, event_id):
         """Fetch a single event by ID."""
         if not self.conn: return None
@@ -131,6 +154,20 @@ class Database:
             events = self._rows_to_events(rows)
             return events[0] if events else None
 
+    def get_events_by_ids(self, event_ids):
+        """Batch form of get_event_by_id: {id: event} for the ids that are stored."""
+        if not self.conn: return {}
+        event_ids = list(dict.fromkeys(event_ids))
+        result = {}
+        with self.lock:
+            cursor = self.conn.cursor()
+            for i in range(0, len(event_ids), 500):
+                chunk = event_ids[i:i + 500]
+                cursor.execute("SELECT * FROM events WHERE id IN (%s)" % ",".join("?" * len(chunk)), chunk)
+                for ev in self._rows_to_events(cursor.fetchall()):
+                    result[ev['id']] = ev
+        return result
+
     def get_feed_for_user(self, pubkey, limit=50):
         if not self.conn: return []
         with self.lock:
@@ -177,15 +214,18 @@ class Database:
         events = []
         for row in rows:
             try:
-                events.append({
-                    'id': row[0],
-                    'pubkey': row[1],
-                    'created_at': row[2],
-                    'kind': row[3],
-                    'content': row[4],
-                    'tags': json.loads(row[5]),
-                    'sig': row[6]
-                })
-            except:
-                pass
+                tags = fastjson.loads(row[5])
+            except (TypeError, ValueError) as e:
+                # Keep the event; a bad tags column shouldn't hide the post
+                print(f"⚠️ DB Bad Tags for {row[0]}: {e}")
+                tags = []
+            events.append({
+                'id': row[0],
+                'pubkey': row[1],
+                'created_at': row[2],
+                'kind': row[3],
+                'content': row[4],
+                'tags': tags,
+                'sig': row[6]
+            })
         return events
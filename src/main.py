@@ -1,20 +1,34 @@
 #!/usr/bin/env python3
+import os
 import sys
-import json
 import time
 import gi
-import traceback
+import weakref
+import bisect
+import collections
+import concurrent.futures
 import gnostr
 from gnostr.key_manager import KeyManager
 from gnostr.database import Database
 from gnostr.client import NostrClient
 from gnostr.renderer import ContentRenderer, ImageLoader
 from gnostr.dialogs import LoginDialog, RelayPreferencesWindow
+from gnostr.post_card import PostCard, PostItem
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, GLib, Gio, Pango, Gdk
 
+# Events handled per idle callback when draining a relay burst
+EVENT_FLUSH_BATCH = 20
+
+class ThreadPage(Adw.NavigationPage):
+    # Class-level defaults so callers can test page state without hasattr/getattr
+    hero_id = None
+    root_id = None
+    hero_widget = None
+    is_loaded = True
+
 class MainWindow(Adw.ApplicationWindow):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -28,12 +42,45 @@ class MainWindow(Adw.ApplicationWindow):
         self.client.connect("contacts-updated", self.on_contacts_updated)
         self.client.connect("profile-updated", self.on_profile_updated)
         self.client.connect("metrics-updated", self.on_metrics_updated)
+        self.client.connect("relay-connected", self.on_relay_connected)
 
         self.priv_key = None
         self.pub_key = None
         self.active_feed_type = "following" # Default to following
-        self.event_widgets = {}
+        # Weak so a card dropped by GTK without an unbind (closed page, destroyed box) can't be pinned here
+        self.event_widgets = weakref.WeakValueDictionary()
+        self._eids_by_pubkey = collections.defaultdict(set)
         self.active_profile_pubkey = None
+        self._profile_cache = collections.OrderedDict()
+        self._profile_cache_max = 2048
+        # Bumped per kind-0 delivery; lets _prime_profiles spot snapshots older than an update
+        self._profile_serial = 0
+        self._profile_invalidated = {}
+        # DB jobs submitted but not yet delivered; at zero no snapshot can be stale
+        self._db_pending = 0
+        self._render_tokens_cache = collections.OrderedDict()
+        self._render_tokens_cache_max = 1024
+        self._rendered_cache = collections.OrderedDict()
+        self._rendered_cache_max = 256
+        self._card_pool = []
+        # Feed/profile queries run off the UI thread; generations drop stale results
+        self._db_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._feed_generation = 0
+        self._pending_metrics = {}
+        self._avatar_watchers = {}
+        # quoted event id -> placeholder quote boxes still waiting for it, whether their
+        # post is on screen or parked in _rendered_cache
+        self._quote_index = {}
+        self._event_queue = collections.deque()
+        self._event_flush_source = None
+        self._reconnect_source = None
+        self._network_source = None
+        self._fetch_retry_source = None
+        # (sub_id, filters, snapshot, following hash) of the open feed REQ; re-sent to each relay as it connects
+        self._feed_sub = None
+        self._metrics_flush_source = None
+        self._reset_following()
+        self._card_pool_max = 60
 
         # 1. Root: Toast Overlay (handles popups)
         self.toast_overlay = Adw.ToastOverlay()
@@ -68,7 +115,7 @@ class MainWindow(Adw.ApplicationWindow):
         self.main_stack.add_named(self.split_view, "app")
 
         # Initial Setup
-        self.detect_display_metrics()
+        self._watch_display_metrics()
 
         saved = KeyManager.load_key()
         if saved:
@@ -76,26 +123,38 @@ class MainWindow(Adw.ApplicationWindow):
         else:
             self.main_stack.set_visible_child_name("login")
 
-        GLib.idle_add(self.client.connect_all)
-
-        # Auto-refresh timer
-        GLib.timeout_add_seconds(300, self.on_auto_refresh)
-
-    def detect_display_metrics(self):
-        try:
-            display = Gdk.Display.get_default()
-            monitors = display.get_monitors()
-            if monitors.get_n_items() > 0:
-                monitor = monitors.get_item(0)
-                geo = monitor.get_geometry()
-                scale = monitor.get_scale_factor()
-                if geo.width < 600:
-                    target_width = geo.width * scale
-                    ImageLoader.MAX_WIDTH = int(target_width)
-                else:
-                    ImageLoader.MAX_WIDTH = 800
-        except:
-            ImageLoader.MAX_WIDTH = 800
+        # Background work runs at PRIORITY_LOW so input, layout and redraw always go first
+        GLib.idle_add(self.client.connect_all, priority=GLib.PRIORITY_LOW)
+
+        # Reconnect when the network comes back instead of waking up on a fixed timer;
+        # a dropped relay additionally gets one delayed retry (see on_status_changed).
+        Gio.NetworkMonitor.get_default().connect("network-changed", self.on_network_changed)
+
+    def detect_display_metrics(self, *args):
+        display = Gdk.Display.get_default()
+        if display is None: return
+        # Prefer the monitor the window is on; fall back to the first one before we are mapped
+        surface = self.get_surface()
+        monitor = display.get_monitor_at_surface(surface) if surface else None
+        monitors = display.get_monitors()
+        if monitor is None and monitors.get_n_items() > 0: monitor = monitors.get_item(0)
+        if monitor is None: return
+        if monitor is not self._watched_monitor:
+            # Rotation/resolution changes arrive as geometry notifies on the monitor itself
+            if self._watched_monitor: self._watched_monitor.disconnect(self._watched_monitor_handler)
+            self._watched_monitor = monitor
+            self._watched_monitor_handler = monitor.connect("notify::geometry", self.detect_display_metrics)
+        ImageLoader.set_display_metrics(monitor.get_geometry().width, monitor.get_scale_factor())
+
+    def _watch_display_metrics(self):
+        self._watched_monitor = None
+        self._watched_monitor_handler = 0
+        display = Gdk.Display.get_default()
+        if display: display.get_monitors().connect("items-changed", self.detect_display_metrics)
+        # Moving to another monitor (docking, different scale) changes our scale factor
+        self.connect("notify::scale-factor", self.detect_display_metrics)
+        self.connect("map", self.detect_display_metrics)
+        self.detect_display_metrics()
 
     def setup_sidebar(self):
         self.sidebar_page = Adw.NavigationPage(title="Menu", tag="sidebar")
@@ -116,15 +175,16 @@ class MainWindow(Adw.ApplicationWindow):
         self.rows = {}
         # Items reordered: Following first
         items = [
-            ("following","Following","system-users"),
-            ("global","Global","network-server"),
-            ("profile","Profile","avatar-default"),
-            ("search", "Search User", "system-search")
+            ("following","Following","system-users", lambda: self.switch_feed("following")),
+            ("global","Global","network-server", lambda: self.switch_feed("global")),
+            ("profile","Profile","avatar-default", self.show_my_profile),
+            ("search", "Search User", "system-search", self.show_search_dialog)
         ]
 
-        for r_id, title, icon in items:
+        for r_id, title, icon, handler in items:
             r = Adw.ActionRow(title=title, icon_name=f"{icon}-symbolic")
             r.set_activatable(True)
+            r._handler = handler
             ml.append(r)
             self.rows[r_id] = r
         
@@ -157,33 +217,34 @@ class MainWindow(Adw.ApplicationWindow):
         hb.pack_end(btn_refresh)
         b.append(hb)
 
+        # Feed is a ListView over PostItems: only rows near the viewport get a card
+        self.feed_store = Gio.ListStore(item_type=PostItem)
+        self._feed_items = {}
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_feed_item_setup)
+        factory.connect("bind", self._on_feed_item_bind)
+        factory.connect("unbind", self._on_feed_item_unbind)
+        # Newest first regardless of arrival order (cached rows, backfill and live events mix)
+        sorter = Gtk.NumericSorter(expression=Gtk.PropertyExpression.new(PostItem, None, "created-at"),
+                                   sort_order=Gtk.SortType.DESCENDING)
+        self.feed_model = Gtk.SortListModel(model=self.feed_store, sorter=sorter)
+        self.feed_view = Gtk.ListView(model=Gtk.NoSelection(model=self.feed_model), factory=factory)
+        self.feed_view.remove_css_class("view")
+
         s = Gtk.ScrolledWindow(vexpand=True)
         s.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
-        c = Adw.Clamp(maximum_size=600)
-        self.posts_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12, margin_top=12, margin_bottom=12, margin_start=12, margin_end=12)
-        c.set_child(self.posts_box)
-        s.set_child(c)
+        s.set_child(Adw.ClampScrollable(maximum_size=600, child=self.feed_view))
         b.append(s)
         self.feed_page.set_child(b)
         self.content_nav.add(self.feed_page)
 
-        self.thread_page = Adw.NavigationPage(title="Thread", tag="thread")
-        t_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-        thb = Adw.HeaderBar()
-        t_refresh = Gtk.Button(icon_name="view-refresh-symbolic")
-        t_refresh.set_tooltip_text("Refresh Thread")
-        t_refresh.connect("clicked", self.on_refresh_clicked)
-        thb.pack_end(t_refresh)
-        t_box.append(thb)
-
-        t_scroll = Gtk.ScrolledWindow(vexpand=True)
-        t_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
-        t_clamp = Adw.Clamp(maximum_size=600)
-        self.thread_container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12, margin_top=12, margin_bottom=12, margin_start=12, margin_end=12)
-        t_clamp.set_child(self.thread_container)
-        t_scroll.set_child(t_clamp)
-        t_box.append(t_scroll)
-        self.thread_page.set_child(t_box)
+        # Profile page and thread pages are built on first use
+        self.profile_page = None
+        self._thread_page_pool = []
+        self._thread_page_pool_max = 3
+
+    def _ensure_profile_page(self):
+        if self.profile_page is not None: return self.profile_page
 
         self.profile_page = Adw.NavigationPage(title="Profile", tag="profile")
         p_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
@@ -195,11 +256,23 @@ class MainWindow(Adw.ApplicationWindow):
         
         p_header_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         p_header_box.append(Adw.HeaderBar())
-        
+
+        # Row 0 of the list is the profile header (p_box) so it scrolls with the posts
+        self.profile_header = p_box
+        self.profile_store = Gio.ListStore(item_type=PostItem)
+        self.profile_store.append(PostItem(None, None, None, None))
+        self._profile_items = {}
+        self._profile_generation = 0
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_profile_item_setup)
+        factory.connect("bind", self._on_profile_item_bind)
+        factory.connect("unbind", self._on_profile_item_unbind)
+        p_view = Gtk.ListView(model=Gtk.NoSelection(model=self.profile_store), factory=factory)
+        p_view.remove_css_class("view")
+
         p_scroll = Gtk.ScrolledWindow(vexpand=True)
-        p_clamp = Adw.Clamp(maximum_size=600)
-        p_clamp.set_child(p_box)
-        p_scroll.set_child(p_clamp)
+        p_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        p_scroll.set_child(Adw.ClampScrollable(maximum_size=600, child=p_view))
         p_header_box.append(p_scroll)
         self.profile_page.set_child(p_header_box)
 
@@ -222,47 +295,137 @@ class MainWindow(Adw.ApplicationWindow):
         self.lbl_about.set_wrap_mode(Pango.WrapMode.WORD_CHAR)
 
         self.follow_btn_box = Gtk.Box(halign=Gtk.Align.CENTER, margin_top=10)
+        self.btn_follow = Gtk.Button(label="Follow", css_classes=["pill", "suggested-action"], visible=False)
+        self.btn_follow.connect("clicked", lambda b: self.client.follow_user(self.active_profile_pubkey))
+        self.btn_unfollow = Gtk.Button(label="Unfollow", css_classes=["flat"], visible=False)
+        self.btn_unfollow.connect("clicked", lambda b: self.client.unfollow_user(self.active_profile_pubkey))
+        self.follow_btn_box.append(self.btn_follow)
+        self.follow_btn_box.append(self.btn_unfollow)
 
         for w in [self.prof_avatar, self.lbl_name, npub_box, self.lbl_about, self.follow_btn_box]:
             p_box.append(w)
 
         p_box.append(Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL))
         p_box.append(Gtk.Label(label="Recent Posts", css_classes=["heading"], xalign=0))
-        self.profile_posts_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
-        p_box.append(self.profile_posts_box)
+        return self.profile_page
+
+    def _on_profile_item_setup(self, factory, list_item):
+        list_item.set_child(Adw.Bin(margin_top=6, margin_bottom=6, margin_start=12, margin_end=12))
+
+    def _on_profile_item_bind(self, factory, list_item):
+        item = list_item.get_item()
+        slot = list_item.get_child()
+        if item.event_id is None:
+            slot.set_child(self.profile_header)
+            return
+        card = self.create_post_widget(item.pubkey, item.content, item.event_id, item.tags)
+        if item.metrics and isinstance(card, PostCard): card.set_metrics(*item.metrics)
+        slot.set_child(card)
+
+    def _on_profile_item_unbind(self, factory, list_item):
+        slot = list_item.get_child()
+        c = slot.get_child()
+        slot.set_child(None)
+        if isinstance(c, PostCard): self._release_card(c)
 
     def on_refresh_clicked(self, btn):
         self.client.check_connections()
         page = self.content_nav.get_visible_page()
         if page == self.feed_page:
-            self.switch_feed(self.active_feed_type)
-        elif page == self.thread_page and hasattr(page, 'root_id'):
+            self.switch_feed(self.active_feed_type, resubscribe=True)
+        elif isinstance(page, ThreadPage) and page.root_id:
             self.client.fetch_thread(page.root_id)
         elif page == self.profile_page and self.active_profile_pubkey:
             self.show_profile(self.active_profile_pubkey)
         self.add_toast(Adw.Toast(title="Refreshing..."))
 
+    def on_network_changed(self, monitor, available):
+        # VPN/bridge/route changes fire in bursts; reconnect once things settle
+        if self._network_source:
+            GLib.source_remove(self._network_source)
+            self._network_source = None
+        if available:
+            self._network_source = GLib.timeout_add_seconds(2, self._on_network_settled, priority=GLib.PRIORITY_LOW)
+
+    def _on_network_settled(self):
+        self._network_source = None
+        self.client.check_connections()
+        return False
+
     def on_auto_refresh(self):
         # print("⏰ Auto-refreshing connections...")
+        self._reconnect_source = None
         self.client.check_connections()
-        return True
+        return False
+
+    def on_relay_connected(self, client, url):
+        # A fresh socket has no subscriptions: give it the active feed REQ
+        relay = self.client.active_relays.get(url)
+        if relay and self._feed_sub:
+            sub_id, filters, snapshot, following_hash = self._feed_sub
+            if relay.subscribe(sub_id, filters, snapshot=snapshot) and following_hash is not None:
+                self._following_sub_hash = following_hash
+        self._retry_pending_fetches()
+
+    def _schedule_fetch_retry(self):
+        # Single-shot fallback for a thread/profile REQ that no relay answered
+        if self._fetch_retry_source: GLib.source_remove(self._fetch_retry_source)
+        self._fetch_retry_source = GLib.timeout_add_seconds(3, self._on_fetch_retry, priority=GLib.PRIORITY_LOW)
+
+    def _on_fetch_retry(self):
+        self._fetch_retry_source = None
+        self._retry_pending_fetches()
+        return False
+
+    def _retry_pending_fetches(self):
+        # Anything still waiting on relays is re-requested
+        # (fetches are coalesced by the client, so a burst of connects costs one REQ)
+        page = self.content_nav.get_visible_page()
+        if isinstance(page, ThreadPage) and page.hero_id and not page.is_loaded:
+            self.client.fetch_thread(page.root_id)
+        if page == self.profile_page and self.active_profile_pubkey and self.lbl_name.get_text() == "Loading...":
+            self.client.refetch_profile(self.active_profile_pubkey)
 
     def on_copy_npub(self, btn):
         if self.active_profile_pubkey:
-            npub = gnostr.nostr_utils.hex_to_nsec(self.active_profile_pubkey).replace("nsec", "npub")
+            npub = self._npub_for(self.active_profile_pubkey)
             clipboard = Gdk.Display.get_default().get_clipboard()
             clipboard.set(npub)
             self.add_toast(Adw.Toast(title="Npub Copied"))
 
+    def _npub_for(self, pubkey):
+        # hex_to_npub is memoized in nostr_utils
+        return gnostr.nostr_utils.hex_to_npub(pubkey) or ""
+
     def add_toast(self, toast):
         self.toast_overlay.add_toast(toast)
 
     def show_thread(self, event_id, pubkey, content, tags=[]):
-        page = Adw.NavigationPage(title="Thread")
+        page = self._acquire_thread_page()
         root_id = gnostr.nostr_utils.get_thread_root(tags)
         page.hero_id = event_id
         page.root_id = root_id if root_id else event_id
 
+        cached_event = self.db.get_event_by_id(event_id)
+        if cached_event:
+            pubkey = cached_event['pubkey']
+            content = cached_event['content']
+            tags = cached_event.get('tags', [])
+
+        hero = self.create_post_widget(pubkey, content, event_id, tags, is_hero=True)
+        page.hero_widget = hero
+        page.hero_slot.set_child(hero)
+        page.is_loaded = (cached_event is not None)
+        self.content_nav.push(page)
+
+        self.client.fetch_thread(page.root_id)
+        if not page.is_loaded: self._schedule_fetch_retry()
+
+    def _acquire_thread_page(self):
+        if self._thread_page_pool:
+            return self._thread_page_pool.pop()
+
+        page = ThreadPage(title="Thread")
         b = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         hb = Adw.HeaderBar()
         btn_ref = Gtk.Button(icon_name="view-refresh-symbolic")
@@ -274,55 +437,80 @@ class MainWindow(Adw.ApplicationWindow):
         s.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         c = Adw.Clamp(maximum_size=600)
         container = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12, margin_top=12, margin_bottom=12, margin_start=12, margin_end=12)
-        
-        page.ancestors_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
-        page.replies_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
-        container.append(page.ancestors_box)
 
-        cached_event = self.db.get_event_by_id(event_id)
-        if cached_event:
-            pubkey = cached_event['pubkey']
-            content = cached_event['content']
-            tags = cached_event.get('tags', [])
-
-        hero = self.create_post_widget(pubkey, content, event_id, tags, is_hero=True)
-        page.hero_widget = hero
-        page.is_loaded = (cached_event is not None)
-        container.append(hero)
+        page.ancestors_slot = Adw.Bin()
+        page.replies_slot = Adw.Bin()
+        page.hero_slot = Adw.Bin()
+        self._replace_thread_boxes(page)
+        container.append(page.ancestors_slot)
+        container.append(page.hero_slot)
         container.append(Gtk.Separator(orientation=Gtk.Orientation.HORIZONTAL))
         container.append(Gtk.Label(label="Replies", css_classes=["heading"], xalign=0))
-        container.append(page.replies_box)
+        container.append(page.replies_slot)
 
         page.thread_container = container
+        page.scroller = s
         c.set_child(container)
         s.set_child(c)
         b.append(s)
         page.set_child(b)
-        self.content_nav.push(page)
-
-        self.client.fetch_thread(page.root_id)
-        if not cached_event and pubkey == "Unknown" and content == "Loading...":
-            self.schedule_refresh(page, page.root_id)
-
-    def schedule_refresh(self, page, event_id, attempt=1):
-        def _refresh():
-            if page.is_loaded: return False
-            if attempt > 5: return False
-            self.client.fetch_thread(event_id)
-            GLib.timeout_add(3000, lambda: self.schedule_refresh(page, event_id, attempt + 1))
-            return False
-        GLib.timeout_add(3000, _refresh)
+        page.connect("hidden", self._on_thread_page_hidden)
+        return page
+
+    def _on_thread_page_hidden(self, page):
+        # "hidden" also fires when another page is pushed on top; only recycle popped pages
+        stack = self.content_nav.get_navigation_stack()
+        for i in range(stack.get_n_items()):
+            if stack.get_item(i) == page: return
+        if len(self._thread_page_pool) >= self._thread_page_pool_max: return
+
+        for box in (page.ancestors_box, page.replies_box):
+            self._recycle_cards(box)
+        # Whatever did not fit in the card pool is dropped with its box in one go
+        self._replace_thread_boxes(page)
+        if isinstance(page.hero_widget, PostCard): self._unregister_card(page.hero_widget)
+        page.hero_slot.set_child(None)
+        page.hero_widget = None
+        page.hero_id = None
+        page.is_loaded = True
+        page.scroller.get_vadjustment().set_value(0)
+        self._thread_page_pool.append(page)
+
+    def _replace_thread_boxes(self, page):
+        page.ancestors_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        page.replies_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        page.ancestors_slot.set_child(page.ancestors_box)
+        page.replies_slot.set_child(page.replies_box)
+        # (created_at keys, cards) kept in box order for _insert_sorted
+        page.ancestors_order = ([], [])
+        page.replies_order = ([], [])
 
     def show_profile(self, pubkey):
+        self._ensure_profile_page()
         self.active_profile_pubkey = pubkey
         if self.content_nav.get_visible_page() != self.profile_page:
             self.content_nav.push(self.profile_page)
 
         self.client.fetch_profile(pubkey)
-        npub = gnostr.nostr_utils.hex_to_nsec(pubkey).replace("nsec", "npub")
-        self.lbl_npub.set_text(npub)
+        self.lbl_npub.set_text(self._npub_for(pubkey))
+        self._update_profile_header(pubkey)
+        if self.lbl_name.get_text() == "Loading...": self._schedule_fetch_retry()
+        self._update_follow_button(pubkey)
+
+        # Keep row 0 (the header); one splice drops every post row
+        self._profile_items.clear()
+        self.profile_store.splice(1, self.profile_store.get_n_items() - 1, [])
+        self._profile_generation += 1
+        gen = self._profile_generation
+        self._run_db(lambda: self._with_profiles(self.db.get_feed_for_user(pubkey, limit=20)),
+                     lambda res: self._populate_profile_posts(gen, pubkey, *res))
 
-        profile = self.db.get_profile(pubkey)
+        self.client.subscribe("sub_profile_view", {"kinds": [1], "authors": [pubkey], "limit": 20})
+        self.split_view.set_show_content(True)
+
+    # Header and follow state are patched in place; only show_profile reloads the posts
+    def _update_profile_header(self, pubkey):
+        profile = self._get_profile_cached(pubkey)
         if profile:
             name = profile.get('display_name') or profile.get('name') or "Anonymous"
             self.lbl_name.set_text(name)
@@ -335,44 +523,69 @@ class MainWindow(Adw.ApplicationWindow):
             self.prof_avatar.set_text("?")
             self.lbl_about.set_text("")
             self.prof_avatar.set_custom_image(None)
-            self.schedule_profile_refresh(pubkey)
-
-        c = self.follow_btn_box.get_first_child()
-        if c: self.follow_btn_box.remove(c)
-
-        if self.pub_key and pubkey != self.pub_key:
-            following = self.db.get_following_list(self.pub_key)
-            if pubkey not in following:
-                btn_follow = Gtk.Button(label="Follow", css_classes=["pill", "suggested-action"])
-                btn_follow.connect("clicked", lambda b: self.client.follow_user(pubkey))
-                self.follow_btn_box.append(btn_follow)
-            else:
-                btn_unfollow = Gtk.Button(label="Unfollow", css_classes=["flat"])
-                btn_unfollow.connect("clicked", lambda b: self.client.unfollow_user(pubkey))
-                self.follow_btn_box.append(btn_unfollow)
-
-        c = self.profile_posts_box.get_first_child()
-        while c:
-            self.profile_posts_box.remove(c)
-            c = self.profile_posts_box.get_first_child()
-
-        posts = self.db.get_feed_for_user(pubkey, limit=20)
-        for ev in posts:
-            w = self.create_post_widget(ev['pubkey'], ev['content'], ev['id'], ev.get('tags', []))
-            self.profile_posts_box.append(w)
 
-        self.client.subscribe("sub_profile_view", {"kinds": [1], "authors": [pubkey], "limit": 20})
-        self.split_view.set_show_content(True)
-
-    def schedule_profile_refresh(self, pubkey, attempt=1):
-        def _refresh():
-            if self.active_profile_pubkey != pubkey: return False
-            if self.lbl_name.get_text() != "Loading...": return False
-            if attempt > 5: return False
-            self.client.fetch_profile(pubkey)
-            GLib.timeout_add(2000, lambda: self.schedule_profile_refresh(pubkey, attempt + 1))
-            return False
-        GLib.timeout_add(2000, _refresh)
+    def _update_follow_button(self, pubkey):
+        show = bool(self.pub_key) and pubkey != self.pub_key
+        following = False
+        if show:
+            if self._following_hash is None: self._set_following(self.db.get_following_list(self.pub_key))
+            following = pubkey in self._following_set
+        self.btn_follow.set_visible(show and not following)
+        self.btn_unfollow.set_visible(show and following)
+
+    def _populate_profile_posts(self, gen, pubkey, posts, profiles):
+        # Skip if the user navigated to another profile (or refreshed) meanwhile
+        if gen != self._profile_generation or pubkey != self.active_profile_pubkey: return
+        self._prime_profiles(posts, profiles)
+        items = []
+        for ev in posts:
+            if ev['id'] in self._profile_items: continue
+            item = PostItem(ev['id'], ev['pubkey'], ev['content'], ev.get('tags', []), ev.get('created_at') or 0)
+            self._profile_items[ev['id']] = item
+            items.append(item)
+        self.profile_store.splice(self.profile_store.get_n_items(), 0, items)
+
+    def _with_profiles(self, events, *rest):
+        # Runs on the DB worker: one IN query for every author instead of a lookup per card.
+        # The serial is read before the query, so any later on_profile_updated outranks it.
+        serial = self._profile_serial
+        return (events, (serial, self.db.get_profiles(ev['pubkey'] for ev in events))) + rest
+
+    def _prime_profiles(self, events, snapshot):
+        serial, profiles = snapshot
+        for ev in events:
+            pk = ev['pubkey']
+            if pk in self._profile_cache: continue
+            # Updated since the snapshot was read: leave it to _get_profile_cached
+            if self._profile_invalidated.get(pk, 0) > serial: continue
+            # Misses aren't cached, so a profile that arrives later is picked up
+            prof = profiles.get(pk)
+            if prof is None: continue
+            self._profile_cache[pk] = prof
+            if len(self._profile_cache) > self._profile_cache_max:
+                self._profile_cache.popitem(last=False)
+
+    def _run_db(self, query, done):
+        # Run query on the DB worker and hand its result to done() on the main loop
+        self._db_pending += 1
+        def _finished(fut):
+            try: result = fut.result()
+            except Exception as e:
+                print(f"⚠️ DB Load Error: {e}")
+                GLib.idle_add(self._on_db_job_done)
+                return
+            def _deliver():
+                try: done(result)
+                finally: self._on_db_job_done()
+                return False
+            GLib.idle_add(_deliver)
+        self._db_executor.submit(query).add_done_callback(_finished)
+
+    def _on_db_job_done(self):
+        self._db_pending -= 1
+        # No profile snapshot left in flight, so no recorded invalidation can matter any more
+        if not self._db_pending: self._profile_invalidated.clear()
+        return False
 
     def show_search_dialog(self):
         dialog = Adw.Window(title="Search User", modal=True, transient_for=self)
@@ -389,17 +602,12 @@ class MainWindow(Adw.ApplicationWindow):
         btn_go = Gtk.Button(label="Go", css_classes=["suggested-action"])
         def _on_go(*args):
             text = entry.get_text().strip().replace("nostr:", "")
-            try:
-                if text.startswith("npub"):
-                    hrp, data = gnostr.nostr_utils.bech32_decode(text)
-                    if hrp == "npub" and data:
-                        decoded = gnostr.nostr_utils.convertbits(data, 5, 8, False)
-                        if decoded:
-                            hex_key = bytes(decoded).hex()
-                            dialog.close()
-                            self.show_profile(hex_key)
-                            return
-            except: pass
+            # npub_to_hex reports bad input by returning None, no try needed
+            hex_key = gnostr.nostr_utils.npub_to_hex(text)
+            if hex_key:
+                dialog.close()
+                self.show_profile(hex_key)
+                return
             entry.add_css_class("error")
         btn_go.connect("clicked", _on_go)
         btn_box.append(btn_go)
@@ -408,138 +616,327 @@ class MainWindow(Adw.ApplicationWindow):
         dialog.present()
 
     def create_post_widget(self, pubkey, content, event_id, tags=[], is_hero=False):
-        try:
-            card = Adw.Bin(css_classes=["card"])
-            if is_hero: card.add_css_class("hero")
-            main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12, margin_top=12, margin_bottom=12, margin_start=12, margin_end=12)
-            hb = Gtk.Box(spacing=12)
-
-            card.pubkey = pubkey
-
-            prof = self.db.get_profile(pubkey)
-            name = pubkey[:8]
-            if prof: name = prof.get('display_name') or prof.get('name') or name
-
-            av = Adw.Avatar(size=48 if is_hero else 40, show_initials=True, text=name)
-            card.avatar = av
-            if prof and prof.get('picture'):
-                ImageLoader.load_avatar(prof['picture'], lambda t: av.set_custom_image(t))
-
-            btn_av = Gtk.Button(css_classes=["flat"])
-            btn_av.set_child(av)
-            btn_av.connect("clicked", lambda b: self.show_profile(pubkey))
-            hb.append(btn_av)
-
-            nb = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-            lbl_name = Gtk.Label(label=name, xalign=0, css_classes=["heading"])
-            card.lbl_name = lbl_name
-            nb.append(lbl_name)
-
-            lbl_npub = Gtk.Label(label=pubkey[:12]+"...", xalign=0, css_classes=["caption", "dim-label"])
-            nb.append(lbl_npub)
-            hb.append(nb)
-            main_box.append(hb)
-
-            try: main_box.append(ContentRenderer.render(content, self, card))
-            except Exception as re:
-                main_box.append(Gtk.Label(label=f"[Content Error]"))
-
-            footer = Gtk.Box(spacing=20, margin_top=8)
-            def mk_met(icon):
-                b = Gtk.Box(spacing=6)
-                b.append(Gtk.Image.new_from_icon_name(icon))
-                l = Gtk.Label(label="0", css_classes=["caption", "dim-label"])
-                b.append(l)
-                return b, l
-            r_box, l_rep = mk_met("chat-bubble-symbolic")
-            rt_box, l_ret = mk_met("media-playlist-repeat-symbolic")
-            l_box, l_like = mk_met("starred-symbolic")
-            footer.append(r_box)
-            footer.append(rt_box)
-            footer.append(l_box)
-            main_box.append(footer)
-            card.set_child(main_box)
-            card.lbl_replies = l_rep
-            card.lbl_reposts = l_ret
-            card.lbl_likes = l_like
-            self.event_widgets[event_id] = card
-            if not is_hero:
-                ctrl = Gtk.GestureClick()
-                ctrl.connect("released", lambda c, n, x, y: self.show_thread(event_id, pubkey, content, tags))
-                card.add_controller(ctrl)
-            return card
+        card = self._card_pool.pop() if self._card_pool and not is_hero else self._new_post_card(not is_hero)
+        self._populate_card(card, pubkey, content, event_id, tags, is_hero)
+        return card
+
+    def _new_post_card(self, clickable=True):
+        card = PostCard()
+        # Shared bound handlers; the target is read off the widget, so no per-card closures
+        card.avatar_button.connect("clicked", self._on_avatar_clicked)
+        if clickable:
+            ctrl = Gtk.GestureClick()
+            ctrl.connect("released", self._on_post_clicked)
+            card.add_controller(ctrl)
+        return card
+
+    def _populate_card(self, card, pubkey, content, event_id, tags, is_hero=False):
+        prof = self._get_profile_cached(pubkey)
+        name = pubkey[:8]
+        if prof: name = prof.get('display_name') or prof.get('name') or name
+        card.populate(pubkey, event_id, content, tags, name, is_hero)
+        if prof and prof.get('picture'): self._load_card_avatar(card, prof['picture'])
+
+        card.content_slot.set_child(self._get_rendered_content(card, event_id, content))
+        self._register_card(card)
+
+    def _refresh_hero_in_place(self, page, pubkey, content, event_id, tags):
+        # Re-populate the existing hero card (e.g. a "Loading..." placeholder) instead of building a new one
+        hero = page.hero_widget
+        if not isinstance(hero, PostCard): return
+        if hero.pubkey == pubkey and hero.content == content: return
+        self._unregister_card(hero)
+        hero.recycle()
+        self._populate_card(hero, pubkey, content, event_id, tags, is_hero=True)
+
+    def _on_feed_item_setup(self, factory, list_item):
+        card = self._new_post_card()
+        card.set_margin_top(6)
+        card.set_margin_bottom(6)
+        card.set_margin_start(12)
+        card.set_margin_end(12)
+        list_item.set_child(card)
+
+    def _on_feed_item_bind(self, factory, list_item):
+        item = list_item.get_item()
+        card = list_item.get_child()
+        self._populate_card(card, item.pubkey, item.content, item.event_id, item.tags)
+        if item.metrics: card.set_metrics(*item.metrics)
+
+    def _on_feed_item_unbind(self, factory, list_item):
+        card = list_item.get_child()
+        self._unregister_card(card)
+        card.recycle()
+
+    def _register_card(self, card):
+        # event_widgets plus a pubkey -> event ids index covering authors and mentions
+        self.event_widgets[card.event_id] = card
+        self._eids_by_pubkey[card.pubkey].add(card.event_id)
+        for (pk, lbl, av) in card.mention_widgets: self._eids_by_pubkey[pk].add(card.event_id)
+
+    def _unregister_card(self, card):
+        if self.event_widgets.get(card.event_id) is not card: return
+        del self.event_widgets[card.event_id]
+        for pk in {card.pubkey, *(m[0] for m in card.mention_widgets)}:
+            eids = self._eids_by_pubkey.get(pk)
+            if eids:
+                eids.discard(card.event_id)
+                if not eids: del self._eids_by_pubkey[pk]
+
+    def _on_avatar_clicked(self, btn):
+        self.show_profile(btn._pubkey)
+
+    def _on_post_clicked(self, ctrl, n, x, y):
+        card = ctrl.get_widget()
+        self.show_thread(card.event_id, card.pubkey, card.content, card.tags)
+
+    def _on_quote_clicked(self, btn):
+        self.show_thread(btn._event_id, "Unknown", "Loading...")
+
+    def _load_card_avatar(self, card, url):
+        # All cards waiting on the same picture share one load and one UI-thread callback
+        card._avatar_url = url
+        watchers = self._avatar_watchers.get(url)
+        if watchers is not None:
+            watchers.add(card)
+            return
+        self._avatar_watchers[url] = weakref.WeakSet([card])
+        ImageLoader.load_avatar(url, lambda t: self._on_avatar_ready(url, t))
+
+    def _on_avatar_ready(self, url, texture):
+        for card in self._avatar_watchers.pop(url, ()):
+            # Cards are re-used before the fetch lands; only apply if still showing this picture
+            if card._avatar_url == url: card.avatar.set_custom_image(texture)
+
+    def _release_card(self, card):
+        self._unregister_card(card)
+        card.recycle()
+        if not card.is_hero and len(self._card_pool) < self._card_pool_max: self._card_pool.append(card)
+
+    def _recycle_cards(self, box):
+        c = box.get_first_child()
+        while c and len(self._card_pool) < self._card_pool_max:
+            nxt = c.get_next_sibling()
+            if isinstance(c, PostCard) and not c.is_hero:
+                box.remove(c)
+                self._release_card(c)
+            c = nxt
+
+    def _get_rendered_content(self, card, event_id, content):
+        # Rendered subtrees are kept per event; a card re-bound to the same post just re-parents it
+        cached = self._rendered_cache.get(event_id)
+        if cached and cached[0] == content and cached[1].get_parent() is None:
+            self._rendered_cache.move_to_end(event_id)
+            card.quote_widgets = cached[2]
+            card.mention_widgets = cached[3]
+            # Quotes still showing "Loading..." get another DB/relay lookup on re-bind
+            pending = [(quoted_id, quote_box) for (quoted_id, quote_box) in cached[2]
+                       if quote_box in self._quote_index.get(quoted_id, ())]
+            if pending: self._resolve_quotes(pending)
+            return cached[1]
+        card.quote_widgets = []
+        card.mention_widgets = []
+        # The renderer is the one place a bad post can fail; fall back to its plain text
+        try: box = ContentRenderer.build(self._get_render_tokens(event_id, content), self, card)
         except Exception as e:
-            traceback.print_exc()
-            return Gtk.Label(label="[Widget Error]")
-
-    def on_event_received(self, client, eid, pubkey, content, tags_json):
-        if not self.db.get_profile(pubkey): self.client.fetch_profile(pubkey)
+            print(f"⚠️ Render Error for {event_id[:8]}: {e}")
+            card.quote_widgets = []
+            card.mention_widgets = []
+            box = Gtk.Label(label=content, wrap=True, xalign=0, selectable=True)
+        if card.quote_widgets:
+            for (quoted_id, quote_box) in card.quote_widgets:
+                self._quote_index.setdefault(quoted_id, weakref.WeakSet()).add(quote_box)
+            self._resolve_quotes(list(card.quote_widgets))
+        self._rendered_cache[event_id] = (content, box, card.quote_widgets, card.mention_widgets)
+        if len(self._rendered_cache) > self._rendered_cache_max:
+            _, evicted = self._rendered_cache.popitem(last=False)
+            quoted_ids = [quoted_id for (quoted_id, quote_box) in evicted[2]]
+            del evicted
+            # Drop index entries whose boxes went away with the evicted subtree
+            for quoted_id in quoted_ids:
+                if not self._quote_index.get(quoted_id, True): del self._quote_index[quoted_id]
+        return box
+
+    def _resolve_quotes(self, quotes):
+        # One IN query (plus the quoted authors' profiles) on the DB worker per rendered post
+        ids = [quoted_id for (quoted_id, quote_box) in quotes]
+        self._run_db(lambda: self._with_profiles(list(self.db.get_events_by_ids(ids).values())),
+                     lambda res: self._on_quotes_loaded(quotes, *res))
+
+    def _on_quotes_loaded(self, quotes, events, profiles):
+        self._prime_profiles(events, profiles)
+        by_id = {ev['id']: ev for ev in events}
+        missing = []
+        for (quoted_id, quote_box) in quotes:
+            event = by_id.get(quoted_id)
+            if event:
+                self._fill_quotes(quoted_id, event)
+            elif quoted_id not in missing:
+                missing.append(quoted_id)
+        if missing:
+            # Not cached yet: one REQ for all of them; _flush_events fills them in on arrival
+            sub_id = f"quote_{missing[0][:8]}" if len(missing) == 1 else f"quote_{missing[0][:8]}_{len(missing)}"
+            self.client.request_once(sub_id, {"ids": missing, "limit": len(missing)})
+
+    def _fill_quotes(self, quoted_id, event):
+        boxes = self._quote_index.pop(quoted_id, None)
+        if boxes:
+            for quote_box in list(boxes): self._fill_quote_box(quote_box, event)
+
+    def _fill_quote_box(self, quote_box, event):
+        child = quote_box.get_first_child()
+        while child is not None:
+            quote_box.remove(child)
+            child = quote_box.get_first_child()
+        ContentRenderer._build_quote_content(quote_box, event, self)
+
+    def _get_render_tokens(self, event_id, content):
+        # Parsed tokens are keyed by event id; the content check keeps "Loading..." placeholders out
+        cached = self._render_tokens_cache.get(event_id)
+        if cached and cached[0] == content:
+            self._render_tokens_cache.move_to_end(event_id)
+            return cached[1]
+        tokens = ContentRenderer.parse(content)
+        self._render_tokens_cache[event_id] = (content, tokens)
+        if len(self._render_tokens_cache) > self._render_tokens_cache_max:
+            self._render_tokens_cache.popitem(last=False)
+        return tokens
+
+    def on_event_received(self, client, eid, pubkey, content, tags, created_at):
+        # Relay bursts are queued and drained in slices so the main loop keeps painting.
+        # DEFAULT_IDLE, same as the emits that fill the queue, so background work can't starve it.
+        self._event_queue.append((eid, pubkey, content, tags, created_at))
+        if not self._event_flush_source:
+            self._event_flush_source = GLib.idle_add(self._flush_events, priority=GLib.PRIORITY_DEFAULT_IDLE)
+
+    def _flush_events(self):
         page = self.content_nav.get_visible_page()
-        try: tags = json.loads(tags_json)
-        except: tags = []
-
-        if page == self.profile_page and pubkey == self.active_profile_pubkey:
-            w = self.create_post_widget(pubkey, content, eid, tags)
-            self.profile_posts_box.prepend(w)
-
-        if hasattr(page, 'hero_id'):
-            if eid == page.hero_id:
+        feed_items = []
+        arrived = {}
+        for _ in range(min(len(self._event_queue), EVENT_FLUSH_BATCH)):
+            eid, pubkey, content, tags, created_at = self._event_queue.popleft()
+            if self._process_event(page, eid, pubkey, content, tags, created_at, feed_items):
+                arrived[eid] = {'id': eid, 'pubkey': pubkey, 'content': content, 'tags': tags}
+
+        if feed_items:
+            # Store order doesn't matter; feed_model sorts by created_at
+            self.feed_store.splice(self.feed_store.get_n_items(), 0, feed_items)
+
+        # Quotes still loading are looked up by id instead of scanning every live card
+        for eid, event in arrived.items():
+            if eid in self._quote_index: self._fill_quotes(eid, event)
+
+        if self._event_queue: return True
+        self._event_flush_source = None
+        return False
+
+    def _process_event(self, page, eid, pubkey, content, tags, created_at, feed_items):
+        if not self._get_profile_cached(pubkey): self.client.fetch_profile(pubkey)
+
+        if page == self.profile_page and pubkey == self.active_profile_pubkey and eid not in self._profile_items:
+            item = PostItem(eid, pubkey, content, tags, created_at)
+            self._profile_items[eid] = item
+            self.profile_store.insert(1, item)
+
+        hero_id = page.hero_id if isinstance(page, ThreadPage) else None
+        if hero_id:
+            if eid == hero_id:
                  page.is_loaded = True
-                 if hasattr(page, 'thread_container'):
-                     return
-            is_relevant = False
-            if eid == page.root_id: is_relevant = True
-            else:
-                for t in tags:
-                    if t[0] == 'e' and t[1] == page.root_id: is_relevant = True; break
-
-            if is_relevant:
+                 self._refresh_hero_in_place(page, pubkey, content, eid, tags)
+                 return False
+            root_id = page.root_id
+            # The tag set is only built when the event isn't the root itself
+            if eid == root_id or root_id in gnostr.nostr_utils.get_e_refs(tags):
                 w = self.create_post_widget(pubkey, content, eid, tags)
-                if eid == page.root_id and eid != page.hero_id:
-                    self._insert_sorted(page.ancestors_box, w)
-                elif eid != page.hero_id:
-                    self._insert_sorted(page.replies_box, w)
-                return
+                if eid == root_id and eid != hero_id:
+                    self._insert_sorted(page.ancestors_box, page.ancestors_order, w, created_at)
+                elif eid != hero_id:
+                    self._insert_sorted(page.replies_box, page.replies_order, w, created_at)
+                return False
 
         if page == self.feed_page:
-             w = self.create_post_widget(pubkey, content, eid, tags)
-             self.posts_box.prepend(w)
-
-        for wid, widget in self.event_widgets.items():
-            if hasattr(widget, 'quote_widgets'):
-                for (quoted_id, quote_box) in widget.quote_widgets:
-                    if quoted_id == eid:
-                        child = quote_box.get_first_child()
-                        if child: quote_box.remove(child)
-                        event = self.db.get_event_by_id(eid)
-                        if event: ContentRenderer._build_quote_content(quote_box, event, self)
+             # Already in the store (loaded from the DB or streamed in earlier)
+             if eid in self._feed_items: return True
+             item = PostItem(eid, pubkey, content, tags, created_at)
+             self._feed_items[eid] = item
+             feed_items.append(item)
+        return True
 
-    def _insert_sorted(self, box, widget):
-        box.append(widget)
+    def _insert_sorted(self, box, order, widget, created_at):
+        # Oldest first; bisect over the parallel key list instead of walking GTK siblings
+        keys, widgets = order
+        i = bisect.bisect_right(keys, created_at)
+        box.insert_child_after(widget, widgets[i - 1] if i else None)
+        keys.insert(i, created_at)
+        widgets.insert(i, widget)
 
     def on_contacts_updated(self, client):
-        if self.active_feed_type == "following": self.switch_feed("following")
-        if self.content_nav.get_visible_page() == self.profile_page and self.active_profile_pubkey:
-            self.show_profile(self.active_profile_pubkey)
+        if not self.pub_key: return
+        pk = self.pub_key
+        self._run_db(lambda: self.db.get_following_list(pk), self._on_following_loaded)
+
+    def _on_following_loaded(self, contacts):
+        # Contact list events are re-delivered by every relay; only react to real changes
+        if not self._set_following(contacts): return
+        page = self.content_nav.get_visible_page()
+        if page == self.profile_page and self.active_profile_pubkey:
+            self._update_follow_button(self.active_profile_pubkey)
+        # Following from a profile or thread refreshes the feed underneath without leaving the page
+        if self.active_feed_type == "following": self.switch_feed("following", navigate=page == self.feed_page)
+
+    def _reset_following(self):
+        self._following_set = frozenset()
+        self._following_top_authors = ()
+        self._following_hash = None
+        self._following_sub_hash = None
+
+    def _set_following(self, contacts):
+        fs = frozenset(contacts)
+        h = hash(fs)
+        if h == self._following_hash and fs == self._following_set: return False
+        self._following_set = fs
+        self._following_top_authors = tuple(contacts[:300])
+        self._following_hash = h
+        return True
+
+    def _get_profile_cached(self, pubkey):
+        # Small LRU in front of the profiles table; invalidated by on_profile_updated
+        if pubkey in self._profile_cache:
+            self._profile_cache.move_to_end(pubkey)
+            return self._profile_cache[pubkey]
+        prof = self.db.get_profile(pubkey)
+        self._profile_cache[pubkey] = prof
+        if len(self._profile_cache) > self._profile_cache_max:
+            self._profile_cache.popitem(last=False)
+        return prof
 
     def on_profile_updated(self, client, pubkey):
+        self._profile_serial += 1
+        self._profile_invalidated[pubkey] = self._profile_serial
+        self._profile_cache.pop(pubkey, None)
         if pubkey == self.pub_key: self.load_my_profile_ui()
 
         if pubkey == self.active_profile_pubkey and self.content_nav.get_visible_page() == self.profile_page:
-             self.show_profile(pubkey)
+             self._update_profile_header(pubkey)
 
-        profile = self.db.get_profile(pubkey)
+        profile = self._get_profile_cached(pubkey)
         if not profile: return
 
         name = profile.get('display_name') or profile.get('name') or pubkey[:8]
 
-        for eid, widget in self.event_widgets.items():
-            if hasattr(widget, 'pubkey') and widget.pubkey == pubkey:
-                if hasattr(widget, 'lbl_name'): widget.lbl_name.set_label(name)
-                if hasattr(widget, 'avatar') and profile.get('picture'):
-                    ImageLoader.load_avatar(profile['picture'], lambda t, w=widget: w.avatar.set_custom_image(t))
-
-            if hasattr(widget, 'mention_widgets'):
+        # Only cards authored by or mentioning this pubkey, via the index kept by _register_card
+        eids = self._eids_by_pubkey.get(pubkey, ())
+        for eid in list(eids):
+            widget = self.event_widgets.get(eid)
+            if widget is None:
+                eids.discard(eid)
+                continue
+            if widget.pubkey == pubkey:
+                widget.lbl_name.set_label(name)
+                if profile.get('picture'):
+                    self._load_card_avatar(widget, profile['picture'])
+
+            if widget.mention_widgets:
                 for (btn_pubkey, lbl_name, av) in widget.mention_widgets:
                     if btn_pubkey == pubkey:
                         lbl_name.set_label(name)
@@ -548,31 +945,41 @@ class MainWindow(Adw.ApplicationWindow):
                             ImageLoader.load_avatar(profile['picture'], lambda t, a=av: a.set_custom_image(t))
 
     def on_metrics_updated(self, client, eid, likes, reposts, replies):
-        if eid in self.event_widgets:
-            w = self.event_widgets[eid]
-            if hasattr(w, 'lbl_likes'): w.lbl_likes.set_label(str(likes))
-            if hasattr(w, 'lbl_reposts'): w.lbl_reposts.set_label(str(reposts))
-            if hasattr(w, 'lbl_replies'): w.lbl_replies.set_label(str(replies))
+        # Bursts of reactions are collapsed to the latest counts per event and written once per idle
+        self._pending_metrics[eid] = (likes, reposts, replies)
+        if not self._metrics_flush_source:
+            self._metrics_flush_source = GLib.idle_add(self._flush_metrics)
+
+    def _flush_metrics(self):
+        self._metrics_flush_source = None
+        pending, self._pending_metrics = self._pending_metrics, {}
+        for eid, counts in pending.items():
+            # Kept on the item too so the counts survive the row being unbound and rebound
+            item = self._feed_items.get(eid) or (self._profile_items.get(eid) if self.profile_page else None)
+            if item: item.metrics = counts
+            w = self.event_widgets.get(eid)
+            if isinstance(w, PostCard): w.set_metrics(*counts)
+        return False
 
     def perform_login(self, priv_hex):
         self.priv_key = priv_hex
         self.pub_key = gnostr.nostr_utils.get_public_key(priv_hex)
         self.client.set_keys(self.pub_key, self.priv_key)
+        self._reset_following()
         self.main_stack.set_visible_child_name("app")
 
         # Set default feed to following and load profile UI
         self.active_feed_type = "following"
         self.load_my_profile_ui()
 
-        # Staggered loading
-        GLib.timeout_add(1000, lambda: self.switch_feed("following"))
-        GLib.timeout_add(2000, lambda: self.client.fetch_profile(self.pub_key))
-        GLib.timeout_add(2500, self.client.fetch_contacts)
-        GLib.timeout_add(4000, self.client.fetch_user_relays)
+        # Cached feed loads off-thread right away; profile/contacts/relay list are
+        # requested from each relay as it connects (NostrClient._sync_user)
+        self.switch_feed("following")
+        self.client.sync_user()
 
     def load_my_profile_ui(self):
-        if not self.pub_key: return
-        npub = gnostr.nostr_utils.hex_to_nsec(self.pub_key).replace("nsec", "npub")
+        if not self.pub_key or self.profile_page is None: return
+        npub = self._npub_for(self.pub_key)
         self.lbl_npub.set_text(npub[:12] + "..." + npub[-12:])
         profile = self.db.get_profile(self.pub_key)
         if profile:
@@ -593,48 +1000,93 @@ class MainWindow(Adw.ApplicationWindow):
 
     def on_menu_selected(self, box, row):
         if not row: return
-        if row == self.rows["global"]: self.switch_feed("global")
-        elif row == self.rows["following"]: self.switch_feed("following")
-        elif row == self.rows["profile"]: 
-             if self.pub_key: self.show_profile(self.pub_key)
-        elif row == self.rows["search"]: self.show_search_dialog()
+        row._handler()
         self.split_view.set_show_content(True)
 
+    def show_my_profile(self):
+        if self.pub_key: self.show_profile(self.pub_key)
+
     def on_settings_clicked(self, btn):
         RelayPreferencesWindow(self.client, self).present()
 
     def on_status_changed(self, client, status):
         emoji = {"CONNECTED": "🟢", "WARNING": "🟡", "DISCONNECTED": "🔴"}.get(status, "⚪")
         self.status_label.set_text(emoji)
+        if status == "DISCONNECTED" and not self._reconnect_source:
+            self._reconnect_source = GLib.timeout_add_seconds(300, self.on_auto_refresh, priority=GLib.PRIORITY_LOW)
 
-    def switch_feed(self, feed_type):
+    def switch_feed(self, feed_type, resubscribe=False, navigate=True):
         self.active_feed_type = feed_type
-        self.content_nav.pop_to_page(self.feed_page)
-        self.feed_page.set_title("Feed") 
-        c = self.posts_box.get_first_child()
-        while c:
-            self.posts_box.remove(c)
-            c = self.posts_box.get_first_child()
-        self.event_widgets.clear()
-        cached = []
-        if feed_type == "following" and self.pub_key:
-            cached = self.db.get_feed_following(self.pub_key)
-            contacts = self.db.get_following_list(self.pub_key)
-            if contacts:
-                self.client.subscribe("sub_following", {"kinds": [1], "authors": contacts[:300], "limit": 50})
+        if navigate:
+            self.content_nav.pop_to_page(self.feed_page)
+            self.feed_page.set_title("Feed")
+            self.event_widgets.clear()
+            self._eids_by_pubkey.clear()
+        self._feed_items.clear()
+        self.feed_store.remove_all()
+        self._feed_generation += 1
+        self._feed_sub = None
+        gen = self._feed_generation
+        pk = self.pub_key
+        if feed_type == "following" and pk:
+            self._run_db(lambda: self._with_profiles(self.db.get_feed_following(pk), self.db.get_following_list(pk)),
+                         lambda res: self._populate_feed(gen, *res, resubscribe=resubscribe))
         elif feed_type == "global":
             # Rate limited global feed (reduced from 50 to 20)
-            self.client.subscribe("sub_global", {"kinds": [1], "limit": 20}, snapshot=True)
-        elif feed_type == "me" and self.pub_key:
-            cached = self.db.get_feed_for_user(self.pub_key)
-            self.client.subscribe("sub_me", {"kinds": [1], "authors": [self.pub_key], "limit": 20})
+            self._subscribe_feed("sub_global", {"kinds": [1], "limit": 20}, snapshot=True)
+        elif feed_type == "me" and pk:
+            self._subscribe_feed("sub_me", {"kinds": [1], "authors": [pk], "limit": 20})
+            self._run_db(lambda: self._with_profiles(self.db.get_feed_for_user(pk)),
+                         lambda res: self._populate_feed(gen, *res))
+
+    def _subscribe_feed(self, sub_id, filters, snapshot=False, following_hash=None, send=True):
+        self._feed_sub = (sub_id, filters, snapshot, following_hash)
+        return send and self.client.subscribe(sub_id, filters, snapshot=snapshot)
+
+    def _populate_feed(self, gen, cached, profiles, contacts=None, resubscribe=False):
+        if gen != self._feed_generation: return
+        self._prime_profiles(cached, profiles)
+        if contacts is not None:
+            self._set_following(contacts)
+            if self._following_top_authors:
+                # Same follow set as the open sub_following REQ: nothing to re-send
+                send = resubscribe or self._following_hash != self._following_sub_hash
+                # Only counts as sent once a connected relay took it; otherwise on_relay_connected sends it
+                if self._subscribe_feed("sub_following", {"kinds": [1], "authors": list(self._following_top_authors), "limit": 50},
+                                        following_hash=self._following_hash, send=send):
+                    self._following_sub_hash = self._following_hash
+        items = []
         for ev in cached:
-            w = self.create_post_widget(ev['pubkey'], ev['content'], ev['id'], ev.get('tags', []))
-            self.posts_box.prepend(w)
+            if ev['id'] in self._feed_items: continue
+            item = PostItem(ev['id'], ev['pubkey'], ev['content'], ev.get('tags', []), ev.get('created_at') or 0)
+            self._feed_items[ev['id']] = item
+            items.append(item)
+        # One splice for all; feed_model places them by created_at among any streamed-in posts
+        self.feed_store.splice(self.feed_store.get_n_items(), 0, items)
+
+RENDERERS = ("ngl", "gl", "cairo")
 
 class GnostrApp(Adw.Application):
     def __init__(self, **kwargs):
+        # Renderer must be picked before GTK opens the display. Order: --renderer,
+        # then an explicit GSK_RENDERER from the user, otherwise ngl (fastest for long
+        # scrolled feeds); GTK itself falls back to cairo if GL cannot be initialised.
+        os.environ.setdefault("GSK_RENDERER", "ngl")
         super().__init__(application_id="tech.livingonlinux.gnostr", flags=Gio.ApplicationFlags.FLAGS_NONE, **kwargs)
+        self.add_main_option("renderer", 0, GLib.OptionFlags.NONE, GLib.OptionArg.STRING,
+                             "GTK renderer to use (ngl, gl or cairo)", "RENDERER")
+        self.connect("handle-local-options", self.on_handle_local_options)
+
+    def on_handle_local_options(self, app, options):
+        # Runs before startup, i.e. before GTK reads GSK_RENDERER
+        renderer = options.lookup_value("renderer", GLib.VariantType.new("s"))
+        if renderer:
+            name = renderer.get_string()
+            if name not in RENDERERS:
+                print(f"Unknown renderer '{name}', expected one of: {', '.join(RENDERERS)}")
+                return 1
+            os.environ["GSK_RENDERER"] = name
+        return -1
     def do_activate(self):
         win = self.props.active_window
         if not win: win = MainWindow(application=self)
@@ -2,51 +2,97 @@ import binascii
 import time
 import json
 import hashlib
-import ecdsa
+import functools
+
+# libsecp256k1 bindings when available; python-ecdsa is the pure-Python fallback
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+try:
+    import ecdsa
+except ImportError:
+    ecdsa = None
+
+# orjson is optional; it serializes events for hashing in C when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # --- Bech32 Implementation ---
 CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
-
-def _bech32_polymod(values):
-    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
-    chk = 1
+# byte -> 5-bit value for bytes.translate; 0xff marks bytes outside CHARSET
+_CHARSET_REV = bytes(CHARSET.find(chr(b)) & 0xff for b in range(256))
+_CHARSET_BYTES = CHARSET.encode('ascii')
+# 5-bit value -> CHARSET byte for bytes.translate when encoding
+_CHARSET_FWD = _CHARSET_BYTES * 8
+
+_BECH32_GENERATOR = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+# XOR of the generators selected by each 5-bit value of the top bits
+_POLYMOD_TBL = tuple(
+    functools.reduce(lambda acc, i: acc ^ (_BECH32_GENERATOR[i] if (top >> i) & 1 else 0), range(5), 0)
+    for top in range(32)
+)
+
+def _bech32_polymod(values, chk=1):
+    # One table lookup per symbol instead of five conditional XORs
+    tbl = _POLYMOD_TBL
     for value in values:
-        top = chk >> 25
-        chk = (chk & 0x1ffffff) << 5 ^ value
-        for i in range(5):
-            chk ^= generator[i] if ((top >> i) & 1) else 0
+        chk = (chk & 0x1ffffff) << 5 ^ value ^ tbl[chk >> 25]
     return chk
 
-def _bech32_hrp_expand(hrp):
-    return [ord(x) >> 5 for x in hrp] + [0] + [ord(x) & 31 for x in hrp]
+@functools.lru_cache(maxsize=16)
+def _bech32_hrp_polymod(hrp):
+    # Polymod state after the expanded hrp (high bits, 0, low bits), fed in
+    # directly instead of building the expanded list; only a handful of hrps exist
+    tbl = _POLYMOD_TBL
+    chk = 1
+    for c in hrp:
+        chk = (chk & 0x1ffffff) << 5 ^ (ord(c) >> 5) ^ tbl[chk >> 25]
+    chk = (chk & 0x1ffffff) << 5 ^ tbl[chk >> 25]
+    for c in hrp:
+        chk = (chk & 0x1ffffff) << 5 ^ (ord(c) & 31) ^ tbl[chk >> 25]
+    return chk
 
 def bech32_verify_checksum(hrp, data):
-    return _bech32_polymod(_bech32_hrp_expand(hrp) + data) == 1
+    return _bech32_polymod(data, _bech32_hrp_polymod(hrp)) == 1
 
 def bech32_create_checksum(hrp, data):
-    values = _bech32_hrp_expand(hrp) + data
-    polymod = _bech32_polymod(values + [0, 0, 0, 0, 0, 0]) ^ 1
+    polymod = _bech32_polymod((0, 0, 0, 0, 0, 0), _bech32_polymod(data, _bech32_hrp_polymod(hrp))) ^ 1
     return [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
 
 def bech32_encode(hrp, data):
-    combined = data + bech32_create_checksum(hrp, data)
-    return hrp + '1' + ''.join([CHARSET[d] for d in combined])
+    combined = bytes(data) + bytes(bech32_create_checksum(hrp, data))
+    return hrp + '1' + combined.translate(_CHARSET_FWD).decode('ascii')
 
-def bech32_decode(bech):
-    if ((any(ord(x) < 33 or ord(x) > 126 for x in bech)) or
-            (bech.lower() != bech and bech.upper() != bech)):
+def _bech32_decode(bech):
+    # Printable ASCII without spaces (33..126), checked by C-level str methods
+    # rather than an ord() per character.
+    if not (bech.isascii() and bech.isprintable()) or ' ' in bech:
+        return None, None
+    if bech.lower() != bech and bech.upper() != bech:
         return None, None
     bech = bech.lower()
     pos = bech.rfind('1')
     if pos < 1 or pos + 7 > len(bech):
         return None, None
-    if not all(x in CHARSET for x in bech[pos+1:]):
+    raw = bech[pos+1:].encode('ascii')
+    # Deleting every valid character leaves only the invalid ones
+    if raw.translate(None, _CHARSET_BYTES):
         return None, None
     hrp = bech[:pos]
-    data = [CHARSET.find(x) for x in bech[pos+1:]]
+    data = list(raw.translate(_CHARSET_REV))
     if not bech32_verify_checksum(hrp, data):
         return None, None
-    return hrp, data[:-6]
+    return hrp, tuple(data[:-6])
+
+# Cards re-decode the same embedded nostr: URIs every time they are rendered;
+# the result is cached, so the data part is returned as an immutable tuple.
+# Key helpers (nsec_to_hex via bech32_to_bytes) use the uncached decoder.
+@functools.lru_cache(maxsize=4096)
+def bech32_decode(bech):
+    return _bech32_decode(bech)
 
 def convertbits(data, frombits, tobits, pad=True):
     acc = 0
@@ -69,35 +115,80 @@ def convertbits(data, frombits, tobits, pad=True):
         return None
     return ret
 
+# Fixed-width fast paths for the 8<->5 conversions used by key encoding:
+# the bit regrouping is done by one big int instead of a per-bit loop.
+_5BIT_STR = [format(i, '05b') for i in range(32)]
+
+def _convertbits_8to5(data):
+    """Same result as convertbits(data, 8, 5, True)."""
+    nbits = len(data) * 8
+    pad = -nbits % 5
+    acc = int.from_bytes(data, 'big') << pad
+    return [(acc >> shift) & 31 for shift in range(nbits + pad - 5, -1, -5)]
+
+def _convertbits_5to8(data):
+    """Same result as convertbits(data, 5, 8, False)."""
+    if not data: return []
+    if min(data) < 0 or max(data) > 31: return None
+    nbits = len(data) * 5
+    leftover = nbits % 8
+    if leftover >= 5 or data[-1] & ((1 << leftover) - 1): return None
+    acc = int(''.join([_5BIT_STR[v] for v in data]), 2) >> leftover
+    return list(acc.to_bytes(nbits // 8, 'big'))
+
 # --- Key Utils ---
 
+def bech32_to_bytes(bech):
+    """Decodes a bech32 string to (hrp, payload bytes), or (None, None) if invalid."""
+    hrp, data = _bech32_decode(bech)
+    if data is None: return None, None
+    decoded = _convertbits_5to8(data)
+    if decoded is None: return None, None
+    return hrp, bytes(decoded)
+
+def _bech32_to_hex(hrp, bech):
+    if not bech.startswith(hrp): return None
+    got_hrp, payload = bech32_to_bytes(bech)
+    if got_hrp != hrp: return None
+    return payload.hex()
+
 def nsec_to_hex(nsec):
-    if not nsec.startswith("nsec"): return None
-    hrp, data = bech32_decode(nsec)
-    if hrp != "nsec" or data is None: return None
-    decoded = convertbits(data, 5, 8, False)
-    if decoded is None: return None
-    return bytes(decoded).hex()
+    return _bech32_to_hex("nsec", nsec)
 
-def hex_to_nsec(hex_key):
+def npub_to_hex(npub):
+    return _bech32_to_hex("npub", npub)
+
+def _hex_to_bech32(hrp, hex_key):
     if len(hex_key) != 64: return None
     try:
         data = bytes.fromhex(hex_key)
     except ValueError: return None
-    five_bit_data = convertbits(data, 8, 5, True)
-    if five_bit_data is None: return None
-    return bech32_encode("nsec", five_bit_data)
+    five_bit_data = _convertbits_8to5(data)
+    return bech32_encode(hrp, five_bit_data)
+
+# Functions taking a private key are deliberately not memoized, so secrets
+# don't outlive logout in a process-wide cache.
+def hex_to_nsec(hex_key):
+    return _hex_to_bech32("nsec", hex_key)
+
+# Pubkeys are re-encoded over and over (cards, profile header, copy button)
+@functools.lru_cache(maxsize=4096)
+def hex_to_npub(hex_key):
+    # The checksum covers the hrp, so an npub can't be made by renaming an nsec
+    return _hex_to_bech32("npub", hex_key)
 
 def is_valid_hex_key(key_str):
     if len(key_str) != 64: return False
     try:
-        int(key_str, 16)
-        return True
+        # fromhex skips whitespace between bytes, so a 64-char string must yield all 32
+        return len(bytes.fromhex(key_str)) == 32
     except ValueError: return False
 
 def get_public_key(priv_key_hex):
-    if not ecdsa: return None
+    if not coincurve and not ecdsa: return None
     try:
+        if coincurve:
+            return coincurve.PrivateKey(bytes.fromhex(priv_key_hex)).public_key.format(compressed=True)[1:].hex()
         sk = ecdsa.SigningKey.from_string(bytes.fromhex(priv_key_hex), curve=ecdsa.SECP256k1)
         vk = sk.verifying_key
         compressed = vk.to_string("compressed")
@@ -129,26 +220,49 @@ def get_thread_root(tags):
     # Fallback to first 'e' tag if no marker found (NIP-10 legacy)
     return first_e
 
+def get_e_refs(tags):
+    """Returns the set of event IDs referenced by 'e' tags, for O(1) membership checks."""
+    return {t[1] for t in tags if len(t) >= 2 and t[0] == 'e'}
+
 # --- BIP-340 Signing Logic (Using ecdsa lib primitives) ---
 
+# NIP-01 id serialization: compact separators, non-ASCII left as UTF-8.
+# Built once instead of a fresh JSONEncoder per json.dumps call.
+_EID_ENCODE = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+def _json_bytes(data):
+    if orjson:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # e.g. lone surrogates or ints wider than 64 bits
+            pass
+    return _EID_ENCODE(data).encode('utf-8')
+
 def compute_event_id(event):
-    data = [
-        0,
-        event['pubkey'],
-        event['created_at'],
-        event['kind'],
-        event['tags'],
-        event['content']
-    ]
-    json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-    return hashlib.sha256(json_str.encode('utf-8')).hexdigest()
+    # [0,pubkey,created_at,kind,tags,content] is fed to the hasher piecewise, so the
+    # content (the only large field) is never copied into a full serialized event
+    head = _json_bytes([0, event['pubkey'], event['created_at'], event['kind'], event['tags']])
+    h = hashlib.sha256(memoryview(head)[:-1])
+    h.update(b',')
+    h.update(_json_bytes(event['content']))
+    h.update(b']')
+    return h.hexdigest()
 
 def sha256(b):
     return hashlib.sha256(b).digest()
 
-def tagged_hash(tag, data):
+@functools.lru_cache(maxsize=8)
+def _tagged_hash_prefix(tag):
+    # sha256 state after absorbing SHA256(tag) || SHA256(tag); one 64-byte block
     tag_hash = sha256(tag.encode())
-    return sha256(tag_hash + tag_hash + data)
+    return hashlib.sha256(tag_hash + tag_hash)
+
+def tagged_hash(tag, data):
+    # Only the message is hashed per call; the tag prefix state is copied
+    h = _tagged_hash_prefix(tag).copy()
+    h.update(data)
+    return h.digest()
 
 def schnorr_sign_with_key(msg_bytes, sk):
     curve = sk.curve
@@ -182,14 +296,18 @@ def schnorr_sign_with_key(msg_bytes, sk):
     return R_point.x().to_bytes(32, 'big').hex() + s.to_bytes(32, 'big').hex()
 
 def sign_event(event, priv_key_hex):
-    if not ecdsa:
+    if not coincurve and not ecdsa:
         print("Error: ECDSA not available.")
         return None
 
     try:
         event['id'] = compute_event_id(event)
+        msg = bytes.fromhex(event['id'])
+        if coincurve:
+            event['sig'] = coincurve.PrivateKey(bytes.fromhex(priv_key_hex)).sign_schnorr(msg).hex()
+            return event
         sk = ecdsa.SigningKey.from_string(bytes.fromhex(priv_key_hex), curve=ecdsa.SECP256k1)
-        event['sig'] = schnorr_sign_with_key(bytes.fromhex(event['id']), sk)
+        event['sig'] = schnorr_sign_with_key(msg, sk)
         return event
     except Exception as e:
         print(f"Signing Error: {e}")
@@ -0,0 +1,77 @@
+import gi
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Adw, GObject, Gtk
+
+class PostItem(GObject.Object):
+    """Model row for the feed ListView; cards are bound to these on demand."""
+    __gtype_name__ = 'PostItem'
+
+    # A real GObject property so the feed's NumericSorter can compare it in C
+    created_at = GObject.Property(type=GObject.TYPE_INT64, default=0)
+
+    def __init__(self, event_id, pubkey, content, tags, created_at=0):
+        super().__init__()
+        self.event_id = event_id
+        self.pubkey = pubkey
+        self.content = content
+        self.tags = tags
+        self.created_at = created_at
+        self.metrics = None
+
+@Gtk.Template(resource_path='/me/velocitynet/gnostr/post_card.ui')
+class PostCard(Adw.Bin):
+    """Feed/thread card built from post_card.ui so the widget tree is created by GtkBuilder in C."""
+    __gtype_name__ = 'PostCard'
+
+    avatar_button = Gtk.Template.Child()
+    avatar = Gtk.Template.Child()
+    lbl_name = Gtk.Template.Child()
+    lbl_npub = Gtk.Template.Child()
+    content_slot = Gtk.Template.Child()
+    lbl_replies = Gtk.Template.Child()
+    lbl_reposts = Gtk.Template.Child()
+    lbl_likes = Gtk.Template.Child()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pubkey = None
+        self.event_id = None
+        self.content = ""
+        self.tags = []
+        self.is_hero = False
+        self._avatar_url = None
+        self.quote_widgets = []
+        self.mention_widgets = []
+
+    def populate(self, pubkey, event_id, content, tags, name, is_hero=False):
+        self.pubkey = pubkey
+        self.avatar_button._pubkey = pubkey
+        self.event_id = event_id
+        self.content = content
+        self.tags = tags
+        self.is_hero = is_hero
+        if is_hero: self.add_css_class("hero")
+        self.avatar.set_size(48 if is_hero else 40)
+        self.avatar.set_text(name)
+        self.lbl_name.set_label(name)
+        self.lbl_npub.set_label(pubkey[:12] + "...")
+
+    def set_metrics(self, likes, reposts, replies):
+        for l, n in ((self.lbl_likes, likes), (self.lbl_reposts, reposts), (self.lbl_replies, replies)):
+            text = str(n)
+            if l.get_label() != text: l.set_label(text)
+
+    def recycle(self):
+        # Drop per-post state so the card can be handed out again from the pool
+        self.content_slot.set_child(None)
+        self.avatar.set_custom_image(None)
+        self._avatar_url = None
+        self.remove_css_class("hero")
+        for l in (self.lbl_replies, self.lbl_reposts, self.lbl_likes): l.set_label("0")
+        self.quote_widgets = []
+        self.mention_widgets = []
+        self.pubkey = None
+        self.event_id = None
+        self.content = ""
+        self.tags = []
@@ -1,8 +1,10 @@
 import re
 import html
+import functools
 import gi
 import urllib.request
 import threading
+import collections
 import concurrent.futures
 from urllib.parse import urlparse
 import traceback
@@ -14,67 +16,99 @@ from gi.repository import Gtk, Adw, GLib, Gdk, GdkPixbuf, Pango
 import gnostr.nostr_utils as nostr_utils
 
 class ContentRenderer:
-    LINK_REGEX = re.compile(r'((?:https?://|nostr:)[^\s]+)')
-    IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
-    VIDEO_EXTS = {'.mp4', '.mov', '.webm'}
+    LINK_REGEX = re.compile(r'((?:https?://|nostr:)\S+)')
+    # Sentence punctuation that sticks to the end of a pasted link
+    TRAIL_CHARS = ".,;!?)]}"
+    IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+    VIDEO_EXTS = ('.mp4', '.mov', '.webm')
+    # Extension -> token kind; the longest extension is 5 chars
+    URL_KINDS = {**dict.fromkeys(IMAGE_EXTS, "image"), **dict.fromkeys(VIDEO_EXTS, "video")}
+
+    @staticmethod
+    def classify_url(url):
+        """Returns "image", "video" or "link" from one parse of the URL path."""
+        try: path = urlparse(url).path
+        except ValueError: return "link"
+        dot = path.rfind('.', -5)
+        if dot < 0: return "link"
+        return ContentRenderer.URL_KINDS.get(path[dot:].lower(), "link")
 
     @staticmethod
     def is_image_url(url):
-        try:
-            path = urlparse(url).path.lower()
-            return any(path.endswith(ext) for ext in ContentRenderer.IMAGE_EXTS)
-        except: return False
+        return ContentRenderer.classify_url(url) == "image"
 
     @staticmethod
     def is_video_url(url):
-        try:
-            path = urlparse(url).path.lower()
-            return any(path.endswith(ext) for ext in ContentRenderer.VIDEO_EXTS)
-        except: return False
+        return ContentRenderer.classify_url(url) == "video"
 
     @staticmethod
     def render(content, window_ref, post_widget_ref=None):
-        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
-        if not content: return box
-        
+        return ContentRenderer.build(ContentRenderer.parse(content), window_ref, post_widget_ref)
+
+    @staticmethod
+    def parse(content):
+        """Splits content into (kind, value) tokens; no widgets are created here."""
+        tokens = []
+        if not content: return tokens
+
         try:
             clean_content = html.unescape(content)
+            # Most notes have no links at all; two substring scans are cheaper than the regex
+            if "http" not in clean_content and "nostr:" not in clean_content:
+                return [("text", clean_content)]
             parts = ContentRenderer.LINK_REGEX.split(clean_content)
             current_text_buffer = []
 
-            for part in parts:
+            # split() with one capture group alternates text, match, text, ...
+            for i, part in enumerate(parts):
                 if not part: continue
 
-                if ContentRenderer.LINK_REGEX.match(part):
+                if i & 1:
                     if current_text_buffer:
-                        ContentRenderer._add_text(box, "".join(current_text_buffer))
+                        tokens.append(("text", "".join(current_text_buffer)))
                         current_text_buffer = []
-                    
-                    clean_part = part.rstrip(".,;!?)]}")
-                    trailing = part[len(clean_part):]
-                    
-                    if clean_part.startswith("nostr:"): 
-                        ContentRenderer._add_nostr_card(box, clean_part, window_ref, post_widget_ref)
-                    elif ContentRenderer.is_image_url(clean_part):
-                        # Pass window_ref to calculate proper sizing
-                        ContentRenderer._add_image(box, clean_part, window_ref)
-                    elif ContentRenderer.is_video_url(clean_part):
-                        ContentRenderer._add_link_button(box, clean_part, "▶ Watch Video")
-                    else: 
-                        ContentRenderer._add_link(box, clean_part) 
-                        
+
+                    # Most links end cleanly; only strip (and slice) when the last char needs it
+                    if part[-1] in ContentRenderer.TRAIL_CHARS:
+                        clean_part = part.rstrip(ContentRenderer.TRAIL_CHARS)
+                        trailing = part[len(clean_part):]
+                    else:
+                        clean_part, trailing = part, ""
+
+                    if clean_part.startswith("nostr:"):
+                        tokens.append(("nostr", clean_part))
+                    else:
+                        tokens.append((ContentRenderer.classify_url(clean_part), clean_part))
+
                     if trailing:
                         current_text_buffer.append(trailing)
-                else: 
+                else:
                     current_text_buffer.append(part)
-            
-            if current_text_buffer: 
-                ContentRenderer._add_text(box, "".join(current_text_buffer))
+
+            if current_text_buffer:
+                tokens.append(("text", "".join(current_text_buffer)))
 
         except Exception as e:
             print(f"Render Error: {e}")
-            ContentRenderer._add_text(box, content)
-            
+            tokens = [("text", content)]
+
+        return tokens
+
+    @staticmethod
+    def build(tokens, window_ref, post_widget_ref=None):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        for kind, value in tokens:
+            if kind == "text":
+                ContentRenderer._add_text(box, value)
+            elif kind == "nostr":
+                ContentRenderer._add_nostr_card(box, value, window_ref, post_widget_ref)
+            elif kind == "image":
+                # Pass window_ref to calculate proper sizing
+                ContentRenderer._add_image(box, value, window_ref)
+            elif kind == "video":
+                ContentRenderer._add_link_button(box, value, "▶ Watch Video")
+            else:
+                ContentRenderer._add_link(box, value)
         return box
 
     @staticmethod
@@ -132,27 +166,23 @@ class ContentRenderer:
                 hex_id = ContentRenderer._extract_hex_id(bech32_str)
                 if not hex_id: return
 
-                event = window.db.get_event_by_id(hex_id)
-                
                 quote_frame = Gtk.Frame(css_classes=["quote-card"])
                 quote_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6, margin_top=8, margin_bottom=8, margin_start=8, margin_end=8)
                 quote_frame.set_child(quote_box)
 
-                if event:
-                    ContentRenderer._build_quote_content(quote_box, event, window)
+                # Filled in later: the window looks up all of a post's quotes in one DB query
+                # off the main thread, and asks relays for the ones it doesn't have
+                lbl = Gtk.Label(label=f"Loading Quoted Event...", css_classes=["dim-label"])
+                quote_box.append(lbl)
+                if post_widget_ref:
+                    post_widget_ref.quote_widgets.append((hex_id, quote_box))
                 else:
-                    lbl = Gtk.Label(label=f"Loading Quoted Event...", css_classes=["dim-label"])
-                    quote_box.append(lbl)
                     window.client.request_once(f"quote_{hex_id[:8]}", {"ids": [hex_id], "limit": 1})
 
-                    if post_widget_ref:
-                        if not hasattr(post_widget_ref, 'quote_widgets'):
-                            post_widget_ref.quote_widgets = []
-                        post_widget_ref.quote_widgets.append((hex_id, quote_box))
-
                 wrapper_btn = Gtk.Button(css_classes=["flat", "quote-wrapper"])
                 wrapper_btn.set_child(quote_frame)
-                wrapper_btn.connect("clicked", lambda b: window.show_thread(hex_id, "Unknown", "Loading..."))
+                wrapper_btn._event_id = hex_id
+                wrapper_btn.connect("clicked", window._on_quote_clicked)
                 box.append(wrapper_btn)
 
             elif is_profile:
@@ -185,15 +215,12 @@ class ContentRenderer:
                     window.client.fetch_profile(hex_pk)
 
                 if post_widget_ref:
-                    if not hasattr(post_widget_ref, 'mention_widgets'):
-                        post_widget_ref.mention_widgets = []
                     post_widget_ref.mention_widgets.append((hex_pk, lbl_name, av))
 
                 wrapper_btn = Gtk.Button(css_classes=["flat", "quote-wrapper"])
                 wrapper_btn.set_child(prof_frame)
-                def on_click_prof(b):
-                    window.show_profile(hex_pk)
-                wrapper_btn.connect("clicked", on_click_prof)
+                wrapper_btn._pubkey = hex_pk
+                wrapper_btn.connect("clicked", window._on_avatar_clicked)
                 box.append(wrapper_btn)
 
         except Exception as e:
@@ -202,7 +229,7 @@ class ContentRenderer:
     @staticmethod
     def _build_quote_content(container, event, window):
         pubkey = event['pubkey']
-        prof = window.db.get_profile(pubkey)
+        prof = window._get_profile_cached(pubkey)
         name = pubkey[:8]
         if prof: name = prof.get('display_name') or prof.get('name') or name
 
@@ -223,17 +250,11 @@ class ContentRenderer:
         container.append(lbl_content)
 
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def _extract_hex_id(bech32_str):
         try:
-            hrp, data = nostr_utils.bech32_decode(bech32_str)
-            if not data: return None
-            acc = 0; bits = 0; ret = []; maxv = 255; max_acc = (1 << 12) - 1
-            for value in data:
-                if value < 0 or (value >> 5): return None
-                acc = ((acc << 5) | value) & max_acc
-                bits += 5
-                while bits >= 8: bits -= 8; ret.append((acc >> bits) & maxv)
-            raw_bytes = bytes(ret)
+            hrp, raw_bytes = nostr_utils.bech32_to_bytes(bech32_str)
+            if not raw_bytes: return None
             if hrp in ["note", "npub"]: return raw_bytes.hex()
             if hrp in ["nevent", "nprofile"]:
                 i = 0
@@ -252,14 +273,32 @@ def _launch_ext(win, s):
 
 class ImageLoader:
     _executor = concurrent.futures.ThreadPoolExecutor(max_workers=16)
-    _cache = {}
+    # LRU of decoded textures, bounded by their pixel memory rather than entry count
+    _cache = collections.OrderedDict()
+    _cache_sizes = {}
+    _cache_bytes = 0
+    CACHE_MAX_BYTES = 256 * 1024 * 1024
     _cache_lock = threading.Lock()
     _ongoing = {}
     _ongoing_lock = threading.Lock()
 
+    # Decode bounds; MainWindow updates them from the current monitor via set_display_metrics
+    AVATAR_SIZE = 192 # largest avatar is 96px, x2 for HiDPI
+    MAX_WIDTH = 800
+    # Sources with more pixels than this are dropped as soon as the header is parsed
+    MAX_SOURCE_PIXELS = 64 * 1024 * 1024
+    MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+    CHUNK_SIZE = 64 * 1024
+
+    @staticmethod
+    def set_display_metrics(monitor_width, scale):
+        # Cache keys include the size, so new requests simply decode at the new bounds
+        ImageLoader.MAX_WIDTH = int(min(monitor_width, 800) * scale)
+        ImageLoader.AVATAR_SIZE = 96 * scale
+
     @staticmethod
     def load_avatar(url, callback):
-        ImageLoader._request_image(url, callback, size=(64,64))
+        ImageLoader._request_image(url, callback, size=(ImageLoader.AVATAR_SIZE, ImageLoader.AVATAR_SIZE))
 
     @staticmethod
     def load_image_into_widget(url, container, spinner, window_ref=None):
@@ -298,52 +337,121 @@ class ImageLoader:
             else:
                 container.append(Gtk.Image.new_from_icon_name("image-missing-symbolic"))
 
-        ImageLoader._request_image(url, on_ready, size=None)
+        # Content images are bounded by width; very tall images keep up to 4:1
+        ImageLoader._request_image(url, on_ready, size=(ImageLoader.MAX_WIDTH, ImageLoader.MAX_WIDTH * 4))
 
     @staticmethod
     def _request_image(url, callback, size=None):
         if not url:
             callback(None); return
 
+        # Avatars and full images of the same URL decode to different textures
+        key = (url, size)
         with ImageLoader._cache_lock:
-            if url in ImageLoader._cache:
-                callback(ImageLoader._cache[url])
-                return
-
+            texture = ImageLoader._cache.get(key)
+            if texture is not None: ImageLoader._cache.move_to_end(key)
+        if texture is not None:
+            callback(texture)
+            return
+
+        # One Future per in-flight key; late requests just attach to it (or get the
+        # result straight away if it already finished)
         with ImageLoader._ongoing_lock:
-            if url in ImageLoader._ongoing:
-                ImageLoader._ongoing[url].append((callback, size))
-                return
-            else:
-                ImageLoader._ongoing[url] = [(callback, size)]
-
-        ImageLoader._executor.submit(ImageLoader._worker_fetch, url)
+            future = ImageLoader._ongoing.get(key)
+            if future is None:
+                future = ImageLoader._executor.submit(ImageLoader._worker_fetch, url, size)
+                ImageLoader._ongoing[key] = future
+                future.add_done_callback(lambda f: GLib.idle_add(ImageLoader._notify_main_thread, key, f.result()))
+        # Each waiter gets its own idle dispatch so a popular URL doesn't hitch the main loop
+        future.add_done_callback(lambda f: GLib.idle_add(ImageLoader._deliver, callback, f.result()))
 
     @staticmethod
-    def _worker_fetch(url):
+    def _worker_fetch(url, size):
+        # Fetch, decode and texture creation all happen here; the main loop only gets the texture
         texture = None
         try:
             if url.startswith("http"):
                 req = urllib.request.Request(url, headers={'User-Agent': 'Gnostr/1.0'})
-                with urllib.request.urlopen(req, timeout=15) as r:
-                    data = r.read()
                 loader = GdkPixbuf.PixbufLoader()
-                loader.write(data)
-                loader.close()
-                pix = loader.get_pixbuf()
-                if pix: texture = Gdk.Texture.new_for_pixbuf(pix)
+                state = {'abort': False}
+                loader.connect("size-prepared", ImageLoader._on_size_prepared, size, state)
+                try:
+                    with urllib.request.urlopen(req, timeout=15) as r:
+                        # Headers are enough to skip HTML error pages and huge files
+                        if not ImageLoader._acceptable_response(r.headers):
+                            state['abort'] = True
+                        received = 0
+                        # Decode as chunks arrive instead of buffering the whole file first
+                        while not state['abort']:
+                            chunk = r.read(ImageLoader.CHUNK_SIZE)
+                            if not chunk: break
+                            received += len(chunk)
+                            if received > ImageLoader.MAX_DOWNLOAD_BYTES:
+                                state['abort'] = True
+                                break
+                            loader.write(chunk)
+                finally:
+                    # Always release the decoder; a truncated/aborted image makes close() raise
+                    try:
+                        loader.close()
+                        complete = True
+                    except GLib.Error:
+                        complete = False
+                if complete and not state['abort']:
+                    pix = loader.get_pixbuf()
+                    if pix: texture = Gdk.Texture.new_for_pixbuf(pix)
         except: pass
-        GLib.idle_add(ImageLoader._notify_main_thread, url, texture)
+        return texture
+
+    @staticmethod
+    def _acceptable_response(headers):
+        # Missing headers are allowed; many hosts omit them or send octet-stream
+        ctype = (headers.get('Content-Type') or '').split(';', 1)[0].strip().lower()
+        if ctype and not ctype.startswith('image/') and ctype != 'application/octet-stream':
+            return False
+        length = headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > ImageLoader.MAX_DOWNLOAD_BYTES:
+            return False
+        return True
+
+    @staticmethod
+    def _on_size_prepared(loader, width, height, size, state):
+        if width * height > ImageLoader.MAX_SOURCE_PIXELS:
+            state['abort'] = True
+            return
+        if size: ImageLoader._fit_size(loader, width, height, size)
+
+    @staticmethod
+    def _fit_size(loader, width, height, size):
+        # Let the decoder scale down while decoding instead of producing a full-size pixbuf
+        max_w, max_h = size
+        if width <= max_w and height <= max_h: return
+        scale = min(max_w / width, max_h / height)
+        loader.set_size(max(1, int(width * scale)), max(1, int(height * scale)))
 
     @staticmethod
-    def _notify_main_thread(url, texture):
+    def _cache_put(key, texture):
+        nbytes = texture.get_width() * texture.get_height() * 4
+        with ImageLoader._cache_lock:
+            ImageLoader._cache[key] = texture
+            ImageLoader._cache_bytes += nbytes - ImageLoader._cache_sizes.get(key, 0)
+            ImageLoader._cache_sizes[key] = nbytes
+            # Evict least recently used until under budget, always keeping the newest entry
+            while ImageLoader._cache_bytes > ImageLoader.CACHE_MAX_BYTES and len(ImageLoader._cache) > 1:
+                old_key, _ = ImageLoader._cache.popitem(last=False)
+                ImageLoader._cache_bytes -= ImageLoader._cache_sizes.pop(old_key)
+
+    @staticmethod
+    def _notify_main_thread(key, texture):
+        # Queued ahead of the waiters' _deliver calls, so the cache is filled first
         if texture:
-            with ImageLoader._cache_lock:
-                ImageLoader._cache[url] = texture
+            ImageLoader._cache_put(key, texture)
 
         with ImageLoader._ongoing_lock:
-            callbacks = ImageLoader._ongoing.pop(url, [])
+            ImageLoader._ongoing.pop(key, None)
+        return False
 
-        for (cb, size) in callbacks:
-            cb(texture)
+    @staticmethod
+    def _deliver(callback, texture):
+        callback(texture)
         return False
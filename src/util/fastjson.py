@@ -0,0 +1,28 @@
+import json
+
+# orjson is optional: C/SIMD parsing of relay frames and tag columns when it
+# is installed, stdlib json otherwise.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(s):
+    if orjson:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # orjson rejects a few inputs stdlib accepts (e.g. ints wider than 64 bits)
+            pass
+    return json.loads(s)
+
+
+def dumps(obj):
+    """Compact JSON text (no spaces after separators)."""
+    if orjson:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
@@ -0,0 +1,27 @@
+import json
+from unittest.mock import patch
+
+from src.util import fastjson
+
+FRAME = '["EVENT","sub",{"id":"ab","kind":1,"tags":[["e","x","","root"],["p","y"]],"content":"héllo"}]'
+
+
+def test_loads_matches_stdlib():
+    assert fastjson.loads(FRAME) == json.loads(FRAME)
+
+
+def test_loads_falls_back_for_big_ints():
+    assert fastjson.loads('[18446744073709551616]') == [2 ** 64]
+
+
+def test_dumps_round_trips_compact():
+    obj = json.loads(FRAME)
+    out = fastjson.dumps(obj)
+    assert json.loads(out) == obj
+    assert ', ' not in out
+
+
+def test_without_orjson():
+    with patch.object(fastjson, 'orjson', None):
+        assert fastjson.loads(FRAME) == json.loads(FRAME)
+        assert fastjson.dumps([1, "é"]) == '[1,"é"]'
@@ -0,0 +1,162 @@
+import random
+import pytest
+
+from src import nostr_utils
+
+NSEC = "nsec1vl029mgpspedva04g90vltkh6fvh240zqtv9k0t9af8935ke9laqsnlfe5"
+NSEC_HEX = "67dea2ed018072d675f5415ecfaed7d2597555e202d85b3d65ea4e58d2d92ffa"
+NPUB = "npub10elfcs4fr0l0r8af98jlmgdh9c8tcxjvz9qkw038js35mp4dma8qzvjptg"
+NPUB_HEX = "7e7e9c42a91bfef19fa929e5fda1b72e0ebc1a4c1141673e2794234d86addf4e"
+
+
+def test_nsec_round_trip():
+    assert nostr_utils.nsec_to_hex(NSEC) == NSEC_HEX
+    assert nostr_utils.hex_to_nsec(NSEC_HEX) == NSEC
+
+
+def test_hex_to_npub():
+    assert nostr_utils.hex_to_npub(NPUB_HEX) == NPUB
+    assert nostr_utils.hex_to_npub("zz") is None
+
+
+def test_fast_convertbits_matches_generic():
+    rng = random.Random(1)
+    for length in range(0, 40):
+        data = bytes(rng.randrange(256) for _ in range(length))
+        five = nostr_utils.convertbits(data, 8, 5, True)
+        assert nostr_utils._convertbits_8to5(data) == five
+        assert nostr_utils._convertbits_5to8(five) == nostr_utils.convertbits(five, 5, 8, False)
+
+
+def test_fast_convertbits_rejects_invalid_groups():
+    for values in ([32], [-1], [0], [1, 1]):
+        assert nostr_utils._convertbits_5to8(values) == nostr_utils.convertbits(values, 5, 8, False)
+
+
+def test_bech32_decode_rejects_bad_characters():
+    assert nostr_utils.bech32_decode(NPUB)[0] == "npub"
+    assert nostr_utils.bech32_decode(NPUB.upper())[0] == "npub"
+    for bad in (NPUB[:10] + " " + NPUB[11:], NPUB[:10] + "\n" + NPUB[11:],
+                NPUB[:10] + "é" + NPUB[11:], NPUB[:10] + NPUB[10:].upper()):
+        assert nostr_utils.bech32_decode(bad) == (None, None)
+
+
+def test_key_helpers_are_memoized():
+    pytest.importorskip("ecdsa")
+    nostr_utils.hex_to_npub.cache_clear()
+    nostr_utils.hex_to_npub(NPUB_HEX)
+    nostr_utils.hex_to_npub(NPUB_HEX)
+    assert nostr_utils.hex_to_npub.cache_info().hits == 1
+    assert nostr_utils.get_public_key(NSEC_HEX) == nostr_utils.get_public_key(NSEC_HEX)
+    # Secrets must not be retained in a process-wide cache
+    assert not hasattr(nostr_utils.get_public_key, "cache_info")
+    assert not hasattr(nostr_utils.hex_to_nsec, "cache_info")
+
+
+def test_nsec_to_hex_bypasses_decode_cache():
+    before = nostr_utils.bech32_decode.cache_info().currsize
+    assert nostr_utils.nsec_to_hex(NSEC) == NSEC_HEX
+    assert nostr_utils.bech32_decode.cache_info().currsize == before
+
+
+def test_get_e_refs():
+    tags = [["e", "aa", "", "root"], ["p", "bb"], ["e"], ["e", "cc"]]
+    assert nostr_utils.get_e_refs(tags) == {"aa", "cc"}
+    assert nostr_utils.get_e_refs([]) == set()
+
+
+def test_polymod_table_matches_generator_loop():
+    def reference(values):
+        gen = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+        chk = 1
+        for v in values:
+            top = chk >> 25
+            chk = (chk & 0x1ffffff) << 5 ^ v
+            for i in range(5):
+                chk ^= gen[i] if ((top >> i) & 1) else 0
+        return chk
+
+    rng = random.Random(2)
+    for length in range(0, 80, 7):
+        values = [rng.randrange(32) for _ in range(length)]
+        assert nostr_utils._bech32_polymod(values) == reference(values)
+
+
+def test_npub_to_hex():
+    assert nostr_utils.npub_to_hex(NPUB) == NPUB_HEX
+    assert nostr_utils.npub_to_hex(NSEC) is None
+    assert nostr_utils.npub_to_hex(NPUB[:-1] + "q") is None
+
+
+def test_bech32_decode_is_memoized_and_immutable():
+    nostr_utils.bech32_decode.cache_clear()
+    hrp, data = nostr_utils.bech32_decode(NPUB)
+    assert isinstance(data, tuple)
+    assert nostr_utils.bech32_decode(NPUB)[1] is data
+    assert nostr_utils.bech32_decode.cache_info().hits == 1
+
+
+def test_bech32_decode_rejects_characters_outside_charset():
+    for ch in "bio1":
+        assert nostr_utils.bech32_decode(NPUB[:-3] + ch + NPUB[-2:]) == (None, None)
+
+
+def test_tagged_hash_matches_definition():
+    import hashlib
+    for tag in ("BIP0340/aux", "BIP0340/nonce", "BIP0340/challenge"):
+        th = hashlib.sha256(tag.encode()).digest()
+        for data in (b"", b"\x01" * 32, b"x" * 100):
+            assert nostr_utils.tagged_hash(tag, data) == hashlib.sha256(th + th + data).digest()
+
+
+def test_is_valid_hex_key():
+    assert nostr_utils.is_valid_hex_key(NPUB_HEX)
+    assert nostr_utils.is_valid_hex_key(NPUB_HEX.upper())
+    assert not nostr_utils.is_valid_hex_key(NPUB_HEX[:-1])
+    assert not nostr_utils.is_valid_hex_key(NPUB_HEX[:-1] + "g")
+    assert not nostr_utils.is_valid_hex_key("0x" + NPUB_HEX[2:])
+    assert not nostr_utils.is_valid_hex_key(NPUB_HEX[:30] + "  " + NPUB_HEX[32:])
+
+
+def test_hrp_polymod_matches_expanded_hrp():
+    for hrp in ("npub", "nsec", "note", "nevent", "nprofile"):
+        expanded = [ord(x) >> 5 for x in hrp] + [0] + [ord(x) & 31 for x in hrp]
+        assert nostr_utils._bech32_hrp_polymod(hrp) == nostr_utils._bech32_polymod(expanded)
+
+
+EVENT = {
+    "pubkey": NPUB_HEX,
+    "created_at": 1700000000,
+    "kind": 1,
+    "tags": [["e", "aa" * 32, "", "root"], ["t", "ünïcode"]],
+    "content": "line one\nline \"two\"\t\\ ☕ \x01  ",
+}
+
+
+def _reference_event_id(event):
+    import hashlib
+    import json
+    data = [0, event["pubkey"], event["created_at"], event["kind"], event["tags"], event["content"]]
+    return hashlib.sha256(json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_compute_event_id_matches_nip01_serialization(monkeypatch, use_orjson):
+    if use_orjson and nostr_utils.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(nostr_utils, "orjson", None)
+    assert nostr_utils.compute_event_id(EVENT) == _reference_event_id(EVENT)
+
+
+def test_coincurve_public_key_matches_ecdsa(monkeypatch):
+    pytest.importorskip("coincurve")
+    fast = nostr_utils.get_public_key(NSEC_HEX)
+    pytest.importorskip("ecdsa")
+    monkeypatch.setattr(nostr_utils, "coincurve", None)
+    assert nostr_utils.get_public_key(NSEC_HEX) == fast
+
+
+def test_bech32_to_bytes():
+    assert nostr_utils.bech32_to_bytes(NPUB) == ("npub", bytes.fromhex(NPUB_HEX))
+    assert nostr_utils.bech32_to_bytes(NPUB[:-1] + "q") == (None, None)